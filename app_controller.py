@@ -3,7 +3,12 @@ from managers.ui_manager import UIManager
 from managers.image_processor import ImageProcessor
 from managers.file_manager import FileManager
 from managers.defect_manager import DefectManager
-from managers.history_manager import HistoryManager
+from managers.annotation_store import AnnotationStore
+from managers.history_manager import (
+    HistoryManager, AddDefectCommand, RemoveDefectCommand, AddRectangleCommand,
+    RemoveRectangleCommand, SetDefectPropertyCommand
+)
+from managers.save_queue import SaveQueue
 
 class AppController:
     """
@@ -24,17 +29,34 @@ class AppController:
         # Bind to window state changes
         self.root.bind("<Configure>", self._on_window_configure)
         
+        # Stop background work when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Create managers
         self.file_manager = FileManager()
         self.image_processor = ImageProcessor()
         self.defect_manager = DefectManager()
-        self.history_manager = HistoryManager(max_history=20)
+        self.history_manager = HistoryManager()
+        
+        # Defects and undo history of the images visited before
+        self.annotation_store = AnnotationStore()
+        
+        # Annotated images are written on a background thread
+        self.save_queue = SaveQueue(self.file_manager.save_defects, self.image_processor.load_original_image)
+        
+        # Identifies the current source folder scan so batches of older scans are ignored
+        self.scan_id = 0
+        self.scan_in_progress = False
+        self.scan_has_images = False
         
         # Pan variables
         self.pan_start_x = 0
         self.pan_start_y = 0
         self.is_panning = False
         
+        # Rectangle under the cursor: (defect index, rectangle index) or None
+        self.hover_hit = None
+        
         # Create UI last as it needs access to all other managers
         self.ui_manager = UIManager(self.root, self)
         
@@ -44,6 +66,7 @@ class AppController:
     def load_config(self):
         """Load configuration and set initial state"""
         config = self.file_manager.load_config()
+        self.apply_settings()
         
         if config.get('source_folder') and config.get('destination_folder'):
             self.ui_manager.update_folder_paths(
@@ -52,6 +75,38 @@ class AppController:
             )
             self.load_images()
     
+    def apply_settings(self):
+        """Pass tunable settings from the configuration to the managers"""
+        self.image_processor.configure_prefetch(
+            self.file_manager.get_setting("prefetch_ahead"),
+            self.file_manager.get_setting("prefetch_behind")
+        )
+        self.image_processor.configure_cache(self.file_manager.get_setting("image_cache_mb"))
+        self.image_processor.configure_frame_cache(self.file_manager.get_setting("frame_cache_mb"))
+        self.history_manager.set_max_bytes(self.file_manager.get_setting("undo_history_kb") * 1024)
+        self.annotation_store.set_max_bytes(self.file_manager.get_setting("annotation_sessions_mb") * 1024 * 1024)
+        self.file_manager.configure_encoder(
+            self.file_manager.get_setting("encoder_profile"),
+            self.file_manager.get_setting("encoder_quality")
+        )
+    
+    def on_close(self):
+        """Stop background work and close the application"""
+        self.file_manager.stop_scanning()
+        self.file_manager.stop_watching()
+        
+        # Queued saves must be written before exiting
+        pending = self.save_queue.get_pending_count()
+        if pending:
+            self.ui_manager.update_status(f"Finishing {pending} pending save(s)...")
+            self.root.update_idletasks()
+        self.save_queue.shutdown()
+        self.file_manager.shutdown()
+        
+        self.image_processor.shutdown()
+        self.annotation_store.close()
+        self.root.destroy()
+    
     def select_source_folder(self):
         """Handle source folder selection"""
         folder = self.file_manager.select_source_folder()
@@ -74,26 +129,118 @@ class AppController:
         )
     
     def load_images(self):
-        """Load images from source folder"""
+        """Load images from source folder (listed in the background, in batches)"""
         if not self.file_manager.check_folders():
             return False
+        
+        self.scan_id += 1
+        self.scan_in_progress = True
+        self.scan_has_images = False
+        scan_id = self.scan_id
+        self.ui_manager.filmstrip.set_count(0)
+        
+        # Files added or deleted while reviewing are picked up without a rescan
+        self.file_manager.watch_source_folder(
+            lambda added, removed: self.ui_manager.post(self._on_source_folder_changed, scan_id, added, removed)
+        )
+        
+        # Batches arrive on the scan thread and are handed over to the UI thread
+        return self.file_manager.scan_image_files(
+            lambda image_files, done: self.ui_manager.post(self._on_image_files_scanned, scan_id, image_files, done)
+        )
+    
+    def _on_image_files_scanned(self, scan_id, image_files, done):
+        """Add a batch of scanned image files, showing the first image as soon as it is known"""
+        if scan_id != self.scan_id:
+            return
+        if done:
+            self.scan_in_progress = False
+        
+        if not self.scan_has_images:
+            if not image_files:
+                if done:
+                    self.ui_manager.update_status("No images found in the source folder.")
+                return
             
-        image_files = self.file_manager.get_image_files()
-        if not image_files:
-            return False
-            
-        self.image_processor.set_image_files(image_files, self.file_manager.source_folder)
-        self.load_image(0)
-        return True
+            # First batch of this scan: start showing images right away
+            self.scan_has_images = True
+            self.image_processor.set_image_files(image_files, self.file_manager.source_folder)
+            self.ui_manager.filmstrip.set_count(len(image_files))
+            self.ui_manager.filmstrip.refresh()
+            self.load_image(0)
+            return
+        
+        self.image_processor.append_image_files(image_files)
+        self.ui_manager.filmstrip.set_count(len(self.image_processor.image_files))
+        
+        # Refresh the image count as the folder listing grows
+        self.ui_manager.update_navigation_info(
+            self.image_processor.current_filename,
+            self.image_processor.current_index,
+            len(self.image_processor.image_files)
+        )
+    
+    def _on_source_folder_changed(self, scan_id, added, removed):
+        """Apply image files added to or deleted from the source folder, keeping the current image and defects"""
+        if scan_id != self.scan_id:
+            return
+        if not self.scan_has_images:
+            # Nothing shown yet: new files are handled like a scan batch
+            if added:
+                self._on_image_files_scanned(scan_id, added, False)
+            return
+        
+        added = self.image_processor.append_image_files(added)
+        removed = self.image_processor.remove_image_files(removed)
+        if not added and not removed:
+            return
+        
+        # Filmstrip cells are positional, so deletions shift the visible thumbnails
+        self.ui_manager.filmstrip.set_count(len(self.image_processor.image_files))
+        if removed:
+            self.ui_manager.filmstrip.refresh()
+            if not self.image_processor.current_removed:
+                self.ui_manager.filmstrip.set_current(self.image_processor.current_index)
+        
+        self.ui_manager.update_navigation_info(
+            self.image_processor.current_filename,
+            self.image_processor.current_index,
+            len(self.image_processor.image_files)
+        )
+        
+        # Report what changed in the status bar
+        messages = []
+        if added:
+            messages.append(f"{len(added)} new image(s) found")
+        if removed:
+            messages.append(f"{len(removed)} image(s) removed")
+        if self.image_processor.current_removed:
+            messages.append("the current image was deleted from the source folder")
+        message = ", ".join(messages)
+        self.ui_manager.update_status(message[0].upper() + message[1:] + ".")
     
     def load_image(self, index):
         """Load and display a specific image"""
+        previous_image_path = self.image_processor.image_path
         if not self.image_processor.load_image(index):
             return False
             
-        # Reset states
+        # Rows logged for the previous image are written out
+        self.file_manager.flush_logs()
+        
+        # Keep the previous image's defects and undo history for when it is visited again
+        if previous_image_path:
+            self._store_result_text()
+            self.annotation_store.put(
+                previous_image_path,
+                self.defect_manager.get_defects(),
+                self.defect_manager.get_selected_index(),
+                self.history_manager
+            )
+        
+        # Reset states (a new history, as the previous one is now kept by the store)
         self.defect_manager.clear_defects()
-        self.history_manager.clear_history()
+        self.history_manager = HistoryManager(self.history_manager.max_bytes)
         
         # Clear the results text field
         self.ui_manager.clear_result_text()
@@ -114,19 +261,40 @@ class AppController:
         # Make sure the canvas is updated
         self.ui_manager.canvas.update_idletasks()
         
+        # Start decoding the neighbouring images while this one is being annotated
+        self.image_processor.prefetch_neighbours(*canvas_dimensions)
+        
+        # Highlight the image in the filmstrip
+        self.ui_manager.filmstrip.set_current(index)
+        
         # Clear other UI elements
         self.ui_manager.clear_defects_list()
         self.ui_manager.clear_rectangles_list()
         self.ui_manager.disable_defect_details()
         
-        # Add initial empty state to history
-        self.add_to_history()
-        
-        # Automatically create a default defect
-        self._create_default_defect()
+        # Restore the annotations of an image visited before, or start with a default defect
+        session = self.annotation_store.take(self.image_processor.image_path)
+        if session:
+            self.defect_manager.set_defects(session.defects)
+            session.history.set_max_bytes(self.history_manager.max_bytes)
+            self.history_manager = session.history
+            self.restore_state(session.selected_index)
+        else:
+            self._create_default_defect()
         
         return True
     
+    def on_filmstrip_select(self, index):
+        """Handle a click on a filmstrip thumbnail"""
+        if index != self.image_processor.current_index:
+            self.load_image(index)
+    
+    def get_thumbnail(self, index):
+        """Get the filmstrip thumbnail of an image (refreshes its cell when a missing one is generated)"""
+        return self.image_processor.get_thumbnail(
+            index, lambda thumbnail_path: self.ui_manager.post(self.ui_manager.filmstrip.refresh_cell, index)
+        )
+    
     def _create_default_defect(self):
         """Create a default defect automatically when loading an image"""
         if not self.image_processor.has_current_image():
@@ -151,7 +319,7 @@ class AppController:
         self.ui_manager.select_defect(0)  # Select the first defect
         
         # Add to history
-        self.add_to_history()
+        self.add_to_history(AddDefectCommand(0, defect))
     
     def add_new_defect(self):
         """Create a new defect instance"""
@@ -160,12 +328,7 @@ class AppController:
             return
         
         # Save current results text to the current defect
-        current_selected_index = self.defect_manager.get_selected_index()
-        if current_selected_index >= 0:
-            current_results_text = self.ui_manager.get_result_text()
-            current_defect = self.defect_manager.get_defect(current_selected_index)
-            if current_defect:
-                current_defect["result_text"] = current_results_text
+        self._store_result_text()
         
         # Clear ALL rectangles from canvas (both defect and drawing tags)
         self.ui_manager.canvas.delete("defect")
@@ -194,16 +357,17 @@ class AppController:
         self.ui_manager.select_defect(self.defect_manager.get_defect_count() - 1)
         
         # Add to history
-        self.add_to_history()
+        self.add_to_history(AddDefectCommand(self.defect_manager.get_defect_count() - 1, defect))
     
     def start_draw(self, event):
         """Start drawing a defect rectangle"""
         if self.is_panning:
             return
         
-        # Check if a defect is selected
+        # Check if a defect is selected (a click on a rectangle selects it on release instead)
         if self.defect_manager.get_selected_index() < 0:
-            self.ui_manager.show_info("Please select a defect or create a new one first.")
+            if self._find_rectangle_at(event) is None:
+                self.ui_manager.show_info("Please select a defect or create a new one first.")
             return
         
         self.ui_manager.start_draw(event)
@@ -222,6 +386,8 @@ class AppController:
             
         canvas_coords = self.ui_manager.stop_draw(event)
         if not canvas_coords:
+            # A click without dragging selects the rectangle under the cursor
+            self._select_rectangle_at(event)
             return
             
         # Convert canvas coords to image coords
@@ -251,9 +417,12 @@ class AppController:
         if rectangles_count > 0:
             self.defect_manager.select_rectangle(rectangles_count - 1)
             self.ui_manager.highlight_rectangle(defect_index, rectangles_count - 1)
-        
-        # Add to history
-        self.add_to_history()
+            
+            # Add to history
+            self.add_to_history(AddRectangleCommand(
+                defect_index, rectangles_count - 1,
+                self.defect_manager.get_rectangle(defect_index, rectangles_count - 1).coords
+            ))
     
     def start_pan(self, event):
         """Start panning the image"""
@@ -323,12 +492,7 @@ class AppController:
     def on_defect_selected(self, index):
         """Handle defect selection"""
         # Save current results text to the current defect before switching
-        current_selected_index = self.defect_manager.get_selected_index()
-        if current_selected_index >= 0:
-            current_results_text = self.ui_manager.get_result_text()
-            current_defect = self.defect_manager.get_defect(current_selected_index)
-            if current_defect:
-                current_defect["result_text"] = current_results_text
+        self._store_result_text()
         
         # First deselect the current defect and clear ALL rectangles
         self.defect_manager.deselect_defect()
@@ -348,15 +512,15 @@ class AppController:
             
             # Update UI details
             self.ui_manager.update_defect_details(
-                defect['rename'],
-                defect['category']
+                defect.rename,
+                defect.category
             )
             self.ui_manager.enable_defect_details()
             
             # Load results text for this defect
             self.ui_manager.clear_result_text()
-            if "result_text" in defect and defect["result_text"]:
-                self.ui_manager.set_result_text(defect["result_text"])
+            if defect.result_text:
+                self.ui_manager.set_result_text(defect.result_text)
             
             # Update rectangles list
             self.ui_manager.update_rectangles_list(index)
@@ -397,19 +561,14 @@ class AppController:
         # Get the selected defect
         defect = defects[selected_index]
         
-        # Draw each rectangle for this defect
-        for j, rectangle in enumerate(defect["rectangles"]):
-            # Get original coordinates
-            image_coords = rectangle["coords"]
-            
-            # Convert image coordinates to canvas coordinates
-            canvas_coords = self.image_processor.image_to_canvas_coords(
-                image_coords, canvas_dimensions
-            )
+        # Convert all rectangles of this defect to canvas coordinates at once
+        transform = self.image_processor.get_view_transform(canvas_dimensions)
+        if transform:
+            canvas_coords = transform.image_to_canvas(defect.coords)
             
-            if canvas_coords:
-                # Unpack coordinates
-                canvas_x1, canvas_y1, canvas_x2, canvas_y2 = canvas_coords
+            # Draw each rectangle for this defect
+            for j in range(defect.get_rectangle_count()):
+                canvas_x1, canvas_y1, canvas_x2, canvas_y2 = canvas_coords[j * 4:j * 4 + 4]
                 
                 # Draw rectangle
                 rect_id = self.ui_manager.canvas.create_rectangle(
@@ -419,23 +578,68 @@ class AppController:
                 )
                 
                 # Update rectangle ID in the defect model
-                rectangle["canvas_rect"] = rect_id
+                defect.set_canvas_rect(j, rect_id)
         
         # Force canvas to update again after drawing
         self.ui_manager.canvas.update_idletasks()
         self.ui_manager.canvas.update()  # Force a more complete update
         
         # Highlight the selected rectangle if there is one
-        rectangle_index = self.defect_manager.get_selected_rectangle_index()
-        if rectangle_index >= 0 and rectangle_index < len(defect["rectangles"]):
-            rect_id = defect["rectangles"][rectangle_index].get("canvas_rect")
-            if rect_id:
-                self.ui_manager.canvas.itemconfig(rect_id, outline="red", width=2)
+        self.ui_manager.highlight_rectangle(selected_index, self.defect_manager.get_selected_rectangle_index())
+        
+        # The rectangles were redrawn, so hover feedback starts over
+        self.hover_hit = None
                 
         # Final force update
         self.ui_manager.canvas.update_idletasks()
         self.ui_manager.canvas.update()  # Force a more complete update
     
+    def _find_rectangle_at(self, event):
+        """
+        Find the topmost rectangle under a mouse event, across all defects
+        
+        Returns:
+            tuple or None: (defect index, rectangle index)
+        """
+        transform = self.image_processor.get_view_transform(
+            self.ui_manager.get_canvas_dimensions(), self.ui_manager.get_scroll_offset()
+        )
+        if not transform:
+            return None
+        image_x, image_y = transform.window_to_image((event.x, event.y))
+        return self.defect_manager.find_rectangle_at(image_x, image_y)
+    
+    def _select_rectangle_at(self, event):
+        """Select the topmost rectangle under a mouse event (and its defect)"""
+        hit = self._find_rectangle_at(event)
+        if hit is None:
+            return
+        defect_index, rectangle_index = hit
+        if defect_index != self.defect_manager.get_selected_index():
+            self.ui_manager.select_defect(defect_index)
+        self.on_rectangle_selected(rectangle_index)
+        self.ui_manager.select_rectangle_in_list(rectangle_index)
+    
+    def on_canvas_hover(self, event):
+        """Show the rectangle under the cursor"""
+        if self.is_panning:
+            return
+        hit = self._find_rectangle_at(event)
+        if hit == self.hover_hit:
+            return
+        self.hover_hit = hit
+        
+        # Only the selected defect's rectangles are drawn; others just change the cursor
+        rect_id = None
+        if hit and hit[0] == self.defect_manager.get_selected_index():
+            rect_id = self.defect_manager.get_defect(hit[0]).get_canvas_rect(hit[1])
+        self.ui_manager.set_hover_rectangle(rect_id, hit is not None)
+    
+    def clear_canvas_hover(self):
+        """Remove hover feedback when the cursor leaves the canvas"""
+        self.hover_hit = None
+        self.ui_manager.set_hover_rectangle(None, False)
+    
     def on_rectangle_selected(self, rectangle_index):
         """Handle rectangle selection"""
         defect_index = self.defect_manager.get_selected_index()
@@ -455,12 +659,13 @@ class AppController:
         # Get the canvas rect ID before deletion
         rectangle = self.defect_manager.get_rectangle(defect_index, rectangle_index)
         if rectangle:
-            canvas_rect = rectangle.get("canvas_rect")
+            canvas_rect = rectangle.canvas_rect
             if canvas_rect:
                 self.ui_manager.delete_canvas_rect(canvas_rect)
         
         # Remove the rectangle from the defect
         self.defect_manager.remove_rectangle(defect_index, rectangle_index)
+        command = RemoveRectangleCommand(defect_index, rectangle_index, rectangle.coords)
         
         # Clear and redraw all rectangles for the current defect
         self.ui_manager.canvas.delete("defect")
@@ -472,7 +677,7 @@ class AppController:
         self.ui_manager.update_rectangles_list(defect_index)
         
         # Add to history
-        self.add_to_history()
+        self.add_to_history(command)
     
     def delete_defect(self):
         """Delete the selected defect"""
@@ -483,11 +688,12 @@ class AppController:
         # Get all rectangles in the defect and delete them from the canvas
         rectangles = self.defect_manager.get_rectangles_for_defect(index)
         for rectangle in rectangles:
-            canvas_rect = rectangle.get("canvas_rect")
+            canvas_rect = rectangle.canvas_rect
             if canvas_rect:
                 self.ui_manager.delete_canvas_rect(canvas_rect)
         
         # Remove defect from the model
+        command = RemoveDefectCommand(index, self.defect_manager.get_defect(index))
         self.defect_manager.remove_defect(index)
         
         # Update UI
@@ -501,19 +707,39 @@ class AppController:
             self.ui_manager.select_defect(new_index)
             
         # Add to history
-        self.add_to_history()
+        self.add_to_history(command)
     
     def on_rename_changed(self, new_name):
         """Update defect rename property"""
-        self.defect_manager.update_selected_defect_property('rename', new_name)
+        self._change_selected_defect_property('rename', new_name)
     
     def on_category_changed(self, new_category):
         """Update defect category property"""
-        self.defect_manager.update_selected_defect_property('category', new_category)
+        self._change_selected_defect_property('category', new_category)
     
-    def add_to_history(self):
-        """Add current state to history"""
-        self.history_manager.add_state(self.defect_manager.get_defects_copy())
+    def _change_selected_defect_property(self, property_name, value):
+        """Update a property of the selected defect and record it in the history (unchanged values are not recorded)"""
+        defect = self.defect_manager.get_selected_defect()
+        if not defect:
+            return
+        old_value = getattr(defect, property_name)
+        if self.defect_manager.update_selected_defect_property(property_name, value):
+            self.add_to_history(SetDefectPropertyCommand(
+                self.defect_manager.get_selected_index(), property_name, old_value, value
+            ))
+    
+    def _store_result_text(self):
+        """Save the results text field to the selected defect"""
+        current_selected_index = self.defect_manager.get_selected_index()
+        if current_selected_index >= 0:
+            current_results_text = self.ui_manager.get_result_text()
+            current_defect = self.defect_manager.get_defect(current_selected_index)
+            if current_defect:
+                current_defect.result_text = current_results_text
+    
+    def add_to_history(self, command):
+        """Record a change to the defects in the history"""
+        self.history_manager.add_command(command)
     
     def _on_window_configure(self, event):
         """Handle window configuration changes"""
@@ -530,51 +756,44 @@ class AppController:
     def undo(self):
         """Undo last action"""
         if self.history_manager.can_undo():
-            self.history_manager.undo()
-            self.restore_state()
+            # Keep the text typed into the results field
+            self._store_result_text()
+            command = self.history_manager.undo(self.defect_manager)
+            self.restore_state(command.defect_index)
             return True
         return False
     
     def redo(self):
         """Redo last undone action"""
         if self.history_manager.can_redo():
-            self.history_manager.redo()
-            self.restore_state()
-    
-    def restore_state(self):
-        """Restore state from history"""
-        state = self.history_manager.get_current_state()
-        if state:
-            # Save the current selected index
-            selected_index = self.defect_manager.get_selected_index()
-            
-            # Set the new state
-            self.defect_manager.set_defects(state)
-            
-            # Clear the UI
-            self.ui_manager.clear_defects_list()
-            self.ui_manager.canvas.delete("defect")
-            
-            # Refresh defects list
-            for defect in state:
-                self.ui_manager.add_defect_to_list(defect["name"])
-            
-            # Select the same defect if it still exists
-            if 0 <= selected_index < len(state):
-                self.ui_manager.select_defect(selected_index)
-            elif len(state) > 0:
-                # Select the first defect if previous selection is no longer valid
-                self.ui_manager.select_defect(0)
-            else:
-                # Clear details if no defects
-                self.ui_manager.disable_defect_details()
-                self.ui_manager.clear_result_text()
+            self._store_result_text()
+            command = self.history_manager.redo(self.defect_manager)
+            self.restore_state(command.defect_index)
+    
+    def restore_state(self, defect_index):
+        """Refresh the UI after undo/redo changed the defects, selecting the defect that changed"""
+        defects = self.defect_manager.get_defects()
+        
+        # Deselect first so selecting again does not store the results text into the wrong defect
+        self.defect_manager.deselect_defect()
+        
+        # Clear the UI
+        self.ui_manager.clear_defects_list()
+        self.ui_manager.canvas.delete("defect")
+        
+        # Refresh defects list
+        for defect in defects:
+            self.ui_manager.add_defect_to_list(defect.name)
+        
+        if defects:
+            # Select the changed defect (or its neighbour if it was removed)
+            self.ui_manager.select_defect(max(0, min(defect_index, len(defects) - 1)))
         else:
-            # This happens when we've undone to before the first state
-            self.defect_manager.clear_defects()
-            self.ui_manager.clear_defects_list()
+            # Clear details if no defects
             self.ui_manager.redraw_canvas()
+            self.ui_manager.clear_rectangles_list()
             self.ui_manager.disable_defect_details()
+            self.ui_manager.clear_result_text()
     
     def save_image(self):
         """Save the current image with all defects"""
@@ -596,67 +815,89 @@ class AppController:
             current_results_text = self.ui_manager.get_result_text()
             current_defect = self.defect_manager.get_defect(current_selected_index)
             if current_defect:
-                current_defect["result_text"] = current_results_text
-                print(f"Saved result text for defect {current_defect['name']}")
+                current_defect.result_text = current_results_text
+                print(f"Saved result text for defect {current_defect.name}")
         
-        # Get all defects
-        defects = self.defect_manager.get_defects()
+        # Snapshot the defects and image so the UI can move on while they are written
+        defects = self.defect_manager.get_defects_snapshot()
         print(f"Total defects count: {len(defects)}")
-        
-        # Process and save image for each defect
-        current_image = self.image_processor.get_original_image()
         current_filename = self.image_processor.get_current_filename()
-        
-        save_success = True
-        defects_saved = 0
-        for i, defect in enumerate(defects):
-            print(f"Processing defect {i+1}: {defect['name']}, rectangles: {len(defect['rectangles'])}")
-            # Only save defects that have at least one rectangle
-            if len(defect["rectangles"]) > 0:
-                # Use each defect's individual result text
-                defect_result_text = defect.get("result_text", "")
-                success = self.file_manager.save_image_with_defect(
-                    original_image=current_image,
-                    defect=defect,
-                    original_filename=current_filename,
-                    result_text=defect_result_text
-                )
-                if success:
-                    defects_saved += 1
-                save_success = save_success and success
-            else:
-                print(f"Skipping defect {defect['name']} because it has no rectangles")
-        
-        if save_success:
-            # Use status bar instead of message box for successful saves
-            self.ui_manager.update_status(f"All defects saved successfully. Total: {defects_saved}")
+        pending = self.save_queue.submit(
+            original_image=self.image_processor.original_image,
+            image_path=self.image_processor.image_path,
+            original_filename=current_filename,
+            defects=defects,
+            on_done=lambda filename, saved, total, reused: self.ui_manager.post(
+                self._on_save_done, filename, saved, total, reused
+            )
+        )
+        self.ui_manager.update_status(f"Saving {current_filename} in the background ({pending} pending)...")
+        return True
+    
+    def _on_save_done(self, filename, saved, total, reused):
+        """Report a finished background save in the status bar"""
+        pending = self.save_queue.get_pending_count()
+        waiting = f" ({pending} pending)" if pending else ""
+        if saved == total:
+            self.ui_manager.update_status(
+                f"All defects of {filename} saved successfully. Total: {saved} "
+                f"({saved - reused} rendered, {reused} reused){waiting}"
+            )
         else:
-            # Still show warning for failures
-            self.ui_manager.show_warning(f"Some defects could not be saved. Saved: {defects_saved}/{len(defects)}")
-            
-        return save_success
+            self.ui_manager.update_status(f"Some defects of {filename} could not be saved. Saved: {saved}/{total}{waiting}")
     
     def save_and_next(self):
         """Save and go to next image"""
         if self.save_image():
+            # The results field is cleared by load_image once the text is kept with the defect
             self.ui_manager.clear_canvas()
-            self.ui_manager.clear_result_text()
             self.next_image()
     
+    def no_defects_and_next(self):
+        """File the current image as "No defects found" (original bytes, no rendering) and go to the next image"""
+        if not self.image_processor.has_current_image():
+            self.ui_manager.show_info("No image to save.")
+            return False
+        
+        if not self.file_manager.check_folders():
+            self.ui_manager.show_warning("Source and destination folders must be selected.")
+            return False
+        
+        # The image keeps its name; only the category is recorded
+        current_filename = self.image_processor.get_current_filename()
+        filename, _ = self.image_processor.get_current_filename_parts()
+        image_path = self.image_processor.image_path
+        category = self.file_manager.no_defects_category
+        result_text = self.ui_manager.get_result_text()
+        
+        pending = self.save_queue.submit_task(
+            lambda: self.file_manager.classify_image(image_path, current_filename, category, filename, result_text),
+            current_filename,
+            lambda filename, saved, total, reused: self.ui_manager.post(
+                self._on_save_done, filename, saved, total, reused
+            )
+        )
+        self.ui_manager.update_status(f"Filing {current_filename} as {category} ({pending} pending)...")
+        
+        # The results field is cleared by load_image once the text is kept with the defect
+        self.ui_manager.clear_canvas()
+        self.next_image()
+        return True
+    
     def next_image(self):
         """Load next image"""
-        current = self.image_processor.current_index
-        if current < len(self.image_processor.image_files) - 1:
-            self.load_image(current + 1)
+        next_index = self.image_processor.get_neighbour_index(1)
+        if next_index < len(self.image_processor.image_files):
+            self.load_image(next_index)
         else:
             # Use status bar instead of message box
             self.ui_manager.update_status("This is the last image.")
     
     def prev_image(self):
         """Load previous image"""
-        current = self.image_processor.current_index
-        if current > 0:
-            self.load_image(current - 1)
+        previous_index = self.image_processor.get_neighbour_index(-1)
+        if previous_index >= 0:
+            self.load_image(previous_index)
         else:
             # Use status bar instead of message box
             self.ui_manager.update_status("This is the first image.") 
\ No newline at end of file
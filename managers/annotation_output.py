@@ -0,0 +1,96 @@
+import os
+import json
+from datetime import datetime
+from managers.file_transfer import link_or_copy, hash_file
+from managers.thumbnail_cache import SIDECAR_FOLDER
+
+# Version of the annotation sidecar format
+ANNOTATION_VERSION = 1
+
+# Extension of annotation sidecars in the category folders
+ANNOTATION_EXTENSION = ".json"
+
+def get_originals_folder(destination_folder):
+    """Get the content-addressed store of original images in a destination folder"""
+    return os.path.join(destination_folder, SIDECAR_FOLDER, "originals")
+
+class AnnotationWriter:
+    """
+    Annotation-only output: each original image is stored once in a content-addressed folder
+    (reflinked when possible), and each defect is saved as a small JSON sidecar that refers to it.
+    Highlighted images are rendered on demand by managers.annotation_renderer.
+    """
+    def __init__(self):
+        # Originals already stored in this session: source path -> (signature, stored relative path)
+        self.stored = {}
+
+    def store_original(self, destination_folder, image_path):
+        """
+        Store an original image in the destination once (identical files share one copy)
+
+        Returns:
+            str: Path of the stored original, relative to the destination folder
+        """
+        stat = os.stat(image_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self.stored.get(image_path)
+        if cached and cached[0] == signature and os.path.exists(os.path.join(destination_folder, cached[1])):
+            return cached[1]
+
+        # Name by content so re-saving the same screenshot never stores it twice
+        _, ext = os.path.splitext(image_path)
+        filename = hash_file(image_path) + ext.lower()
+        originals_folder = get_originals_folder(destination_folder)
+        os.makedirs(originals_folder, exist_ok=True)
+        target_path = os.path.join(originals_folder, filename)
+        # Never a hard link: a source rewritten in place would change the original stored under its old hash.
+        # An original hard-linked by an earlier version is replaced with a copy.
+        if not os.path.exists(target_path) or os.path.samefile(image_path, target_path):
+            method = link_or_copy(image_path, target_path, hard_link=False)
+            print(f"Stored original {os.path.basename(image_path)} ({method})")
+
+        relative_path = os.path.relpath(target_path, destination_folder)
+        self.stored[image_path] = (signature, relative_path)
+        return relative_path
+
+    def write_annotation(self, sidecar_path, original_path, original_filename, image_size, defect, rectangle_count):
+        """
+        Write the annotation sidecar of one defect
+
+        Args:
+            sidecar_path (str): Path of the JSON file to write
+            original_path (str): Stored original, relative to the destination folder
+            original_filename (str): Filename of the source image
+            image_size (tuple): Width and height of the original image
+            defect (Defect): Defect with its rectangles, category, rename and result text
+            rectangle_count (int): Number of valid rectangles in the defect
+
+        Returns:
+            int: Bytes written
+        """
+        annotation = {
+            "version": ANNOTATION_VERSION,
+            "original": original_path.replace(os.sep, "/"),
+            "original_filename": original_filename,
+            "image_size": list(image_size),
+            "saved": datetime.now().isoformat(timespec="seconds"),
+            "name": defect.name,
+            "category": defect.category,
+            "rename": defect.rename,
+            "result_text": defect.result_text,
+            "rectangles": defect.get_rectangle_lists(),
+            "rectangle_count": rectangle_count
+        }
+
+        # Write to a temporary file first so readers never see a partial sidecar
+        data = json.dumps(annotation, separators=(",", ":")).encode("utf-8")
+        temp_path = sidecar_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, sidecar_path)
+        return len(data)
+
+def load_annotation(sidecar_path):
+    """Read an annotation sidecar"""
+    with open(sidecar_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,94 @@
+"""
+Renders highlighted defect images from annotation sidecars on demand.
+
+Usage:
+    python -m managers.annotation_renderer DESTINATION_FOLDER [SIDECAR ...] [--profile NAME] [--quality N]
+                                           [--output FOLDER] [--force]
+"""
+import os
+import sys
+import argparse
+from PIL import Image
+from managers.annotation_output import ANNOTATION_EXTENSION, load_annotation
+from managers.defect_renderer import OverlayCompositor
+from managers.defect_model import Defect
+from managers.encoder_profiles import ENCODER_PROFILES, ImageEncoder
+from managers.thumbnail_cache import SIDECAR_FOLDER
+
+def find_annotations(destination_folder):
+    """List the annotation sidecars in the category folders of a destination folder"""
+    sidecars = []
+    for root, folders, files in os.walk(destination_folder):
+        # Stored originals and other cached data are not annotations
+        if SIDECAR_FOLDER in folders:
+            folders.remove(SIDECAR_FOLDER)
+        for name in files:
+            if name.endswith(ANNOTATION_EXTENSION):
+                sidecars.append(os.path.join(root, name))
+    return sorted(sidecars)
+
+def render_annotation(destination_folder, sidecar_path, encoder, output_folder=None, force=False):
+    """
+    Render the highlighted image of one annotation sidecar
+
+    Args:
+        destination_folder (str): Destination folder the sidecar's original path is relative to
+        sidecar_path (str): Annotation sidecar to render
+        encoder (ImageEncoder): Encoder profile used to write the image
+        output_folder (str): Folder to write to (default: next to the sidecar)
+        force (bool): Render even if an up-to-date image exists
+
+    Returns:
+        str or None: Path of the rendered image, or None if it was already up to date
+    """
+    annotation = load_annotation(sidecar_path)
+    extension = encoder.get_extension(annotation["original_filename"])
+    base_name = os.path.splitext(os.path.basename(sidecar_path))[0]
+    sidecar_folder = os.path.dirname(sidecar_path)
+    if output_folder:
+        # Keep the category folders in the output folder
+        sidecar_folder = os.path.join(output_folder, os.path.relpath(sidecar_folder, destination_folder))
+        os.makedirs(sidecar_folder, exist_ok=True)
+    output_path = os.path.join(sidecar_folder, base_name + extension)
+
+    # Rendered images are only redone when the annotation changed after them
+    if not force and os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(sidecar_path):
+        return None
+
+    original_path = os.path.join(destination_folder, annotation["original"])
+    defect = Defect.from_dict(annotation)
+    with Image.open(original_path) as original_image:
+        original_image.load()
+        compositor = OverlayCompositor(original_image)
+    rectangles_drawn, _, _ = compositor.save_defect(defect, output_path, encoder)
+    return output_path if rectangles_drawn else None
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Render highlighted images from annotation sidecars")
+    parser.add_argument("destination", help="Destination folder the annotations were saved to")
+    parser.add_argument("sidecars", nargs="*", help="Sidecars to render (default: all in the destination folder)")
+    parser.add_argument("--profile", default="default", choices=sorted(ENCODER_PROFILES), help="Encoder profile")
+    parser.add_argument("--quality", type=int, default=90, help="Quality of the lossy profiles (1-100)")
+    parser.add_argument("--output", help="Folder to write the images to (default: next to each sidecar)")
+    parser.add_argument("--force", action="store_true", help="Render even if an up-to-date image exists")
+    args = parser.parse_args(argv)
+
+    encoder = ImageEncoder(args.profile, args.quality)
+    sidecars = args.sidecars or find_annotations(args.destination)
+
+    rendered = 0
+    failed = 0
+    for sidecar_path in sidecars:
+        try:
+            if render_annotation(args.destination, sidecar_path, encoder, args.output, args.force):
+                rendered += 1
+        except Exception as e:
+            print(f"Failed to render {sidecar_path}: {str(e)}")
+            failed += 1
+
+    print(f"Rendered {rendered} of {len(sidecars)} annotation(s), {failed} failed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
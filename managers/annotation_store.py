@@ -0,0 +1,174 @@
+import os
+import sys
+import zlib
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+class AnnotationSession:
+    """The defects, selection and undo history of one image"""
+    def __init__(self, signature, defects, selected_index, history):
+        # Modification time and size of the image when it was annotated
+        self.signature = signature
+
+        # Defects, the selected defect and the undo history
+        self.defects = defects
+        self.selected_index = selected_index
+        self.history = history
+
+    def get_size(self):
+        """Estimate the memory of the session in bytes"""
+        size = sys.getsizeof(self.defects) + self.history.size
+        for defect in self.defects:
+            size += defect.get_size()
+        return size
+
+class AnnotationStore:
+    """
+    Keeps the annotation session of every visited image so returning to an image restores its
+    defects and undo history. Recently used sessions stay in memory up to a budget; older ones are
+    compressed into a journal file that is deleted when the application closes.
+    """
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        # Memory budget for the sessions kept in memory
+        self.max_bytes = max_bytes
+
+        # Image path -> session, least recently used first, and their estimated memory
+        self.sessions = OrderedDict()
+        self.sizes = {}
+        self.size = 0
+
+        # Spilled sessions: image path -> (offset, length) in the journal, and bytes no longer used
+        self.journal = None
+        self.spilled = {}
+        self.dead_bytes = 0
+        self.lock = threading.Lock()
+
+    def set_max_bytes(self, max_bytes):
+        """Change the memory budget"""
+        with self.lock:
+            self.max_bytes = max_bytes
+            self._spill()
+
+    def put(self, image_path, defects, selected_index, history):
+        """
+        Keep the session of an image when navigating away from it
+
+        Args:
+            image_path (str): Full path of the image
+            defects (list): Defects of the image
+            selected_index (int): Index of the selected defect
+            history (HistoryManager): Undo history of the image
+        """
+        signature = self._get_signature(image_path)
+        if signature is None:
+            return
+
+        # Canvas items belong to the displayed image only
+        for defect in defects:
+            defect.clear_canvas_rects()
+        history.compact()
+
+        with self.lock:
+            self._discard(image_path)
+            if not defects and not history.can_undo():
+                return
+            session = AnnotationSession(signature, defects, selected_index, history)
+            self.sessions[image_path] = session
+            self.sizes[image_path] = session.get_size()
+            self.size += self.sizes[image_path]
+            self._spill()
+
+    def take(self, image_path):
+        """
+        Get and remove the session of an image
+
+        Returns:
+            AnnotationSession or None: The session, or None if the image was not annotated or has changed since
+        """
+        with self.lock:
+            session = self.sessions.pop(image_path, None)
+            if session is not None:
+                self.size -= self.sizes.pop(image_path)
+            elif image_path in self.spilled:
+                session = self._read_spilled(image_path)
+
+        # An image replaced under the same name gets a fresh session
+        if session is not None and session.signature != self._get_signature(image_path):
+            return None
+        return session
+
+    def close(self):
+        """Drop all sessions and delete the journal"""
+        with self.lock:
+            self.sessions.clear()
+            self.sizes = {}
+            self.size = 0
+            self.spilled = {}
+            self.dead_bytes = 0
+            if self.journal:
+                self.journal.close()
+            self.journal = None
+
+    def _get_signature(self, image_path):
+        """Get the modification time and size of an image, or None if it cannot be read"""
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _discard(self, image_path):
+        """Forget the stored session of an image"""
+        if image_path in self.sessions:
+            del self.sessions[image_path]
+            self.size -= self.sizes.pop(image_path)
+        if image_path in self.spilled:
+            self.dead_bytes += self.spilled.pop(image_path)[1]
+
+    def _spill(self):
+        """Move the least recently used sessions to the journal until the rest fit the memory budget"""
+        while self.size > self.max_bytes and self.sessions:
+            image_path, session = self.sessions.popitem(last=False)
+            self.size -= self.sizes.pop(image_path)
+            try:
+                # Pickling keeps the defects shared between the defect list and the undo commands
+                data = zlib.compress(pickle.dumps(session, pickle.HIGHEST_PROTOCOL))
+                if self.journal is None:
+                    # Anonymous file: removed by the OS when closed, readable only by this process
+                    self.journal = tempfile.TemporaryFile(prefix="bug_validator_sessions_")
+                self.journal.seek(0, os.SEEK_END)
+                self.spilled[image_path] = (self.journal.tell(), len(data))
+                self.journal.write(data)
+            except Exception as e:
+                print(f"Failed to store annotations of {os.path.basename(image_path)}: {str(e)}")
+        self._compact_journal()
+
+    def _read_spilled(self, image_path):
+        """Read and remove a session from the journal"""
+        offset, length = self.spilled.pop(image_path)
+        self.dead_bytes += length
+        try:
+            self.journal.seek(offset)
+            return pickle.loads(zlib.decompress(self.journal.read(length)))
+        except Exception as e:
+            print(f"Failed to restore annotations of {os.path.basename(image_path)}: {str(e)}")
+            return None
+
+    def _compact_journal(self):
+        """Rewrite the journal once most of it holds sessions that were taken back or replaced"""
+        if self.journal is None or self.dead_bytes < 1024 * 1024 or self.dead_bytes < sum(
+            length for _, length in self.spilled.values()
+        ):
+            return
+        journal = tempfile.TemporaryFile(prefix="bug_validator_sessions_")
+        spilled = {}
+        for image_path, (offset, length) in self.spilled.items():
+            self.journal.seek(offset)
+            spilled[image_path] = (journal.tell(), length)
+            journal.write(self.journal.read(length))
+        self.journal.close()
+        self.journal = journal
+        self.spilled = spilled
+        self.dead_bytes = 0
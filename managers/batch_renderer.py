@@ -0,0 +1,315 @@
+"""
+Renders defects from annotation files into the destination's category folders without the UI.
+
+Usage:
+    python -m managers.batch_renderer SOURCE_FOLDER DESTINATION_FOLDER [--annotations PATH]
+                                      [--workers N] [--profile NAME] [--quality N] [--output-mode MODE]
+
+Annotation JSON files hold one image object or a list of them:
+    {"image": "shot.png", "defects": [{"name": "Defect 1", "category": "Bug for current Project",
+      "rename": "shot_Defect 1", "rectangles": [[x1, y1, x2, y2], ...], "result_text": ""}]}
+
+Annotation CSV files have one row per rectangle with the columns
+    image, x1, y1, x2, y2 and optionally name, category, rename, result_text.
+Rows of the same image and defect name are grouped into one defect.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from PIL import Image
+from managers.file_manager import FileManager
+from managers.defect_renderer import OverlayCompositor
+from managers.defect_model import Defect
+from managers.encoder_profiles import ENCODER_PROFILES
+from managers.render_index import get_source_identity
+
+def render_image(image_path, jobs, encoder):
+    """
+    Decode one image and render all of its defects (runs in a worker process)
+
+    Args:
+        image_path (str): Full path of the source image
+        jobs (list): (defect, output path) pairs
+        encoder (ImageEncoder): Encoder profile used to write the files
+
+    Returns:
+        tuple: (list of (rectangles drawn, seconds spent encoding, bytes written) per job, bytes read)
+    """
+    with Image.open(image_path) as original_image:
+        original_image.load()
+        compositor = OverlayCompositor(original_image)
+
+    results = []
+    for defect, output_path in jobs:
+        try:
+            results.append(compositor.save_defect(defect, output_path, encoder))
+        except Exception as e:
+            print(f"Failed to save {os.path.basename(output_path)}: {str(e)}")
+            results.append((0, 0, 0))
+    return results, os.path.getsize(image_path)
+
+def load_annotations(path, default_category):
+    """
+    Read annotation JSON and CSV files
+
+    Args:
+        path (str): Annotation file, or a folder whose .json and .csv files are read
+        default_category (str): Category of defects that do not specify one
+
+    Returns:
+        OrderedDict: Image filename -> list of Defect objects
+    """
+    if os.path.isdir(path):
+        files = [
+            os.path.join(path, name) for name in sorted(os.listdir(path))
+            if name.lower().endswith((".json", ".csv"))
+        ]
+    else:
+        files = [path]
+
+    images = OrderedDict()
+    for file_path in files:
+        if file_path.lower().endswith(".csv"):
+            entries = _read_csv_annotations(file_path)
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                entries = [entries]
+
+        for entry in entries:
+            defects = images.setdefault(entry["image"], [])
+            for defect in entry.get("defects", []):
+                defects.append(_make_defect(entry["image"], defect, len(defects) + 1, default_category))
+    return images
+
+def _read_csv_annotations(file_path):
+    """Group the rectangle rows of an annotation CSV into image entries"""
+    images = OrderedDict()
+    with open(file_path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            defects = images.setdefault(row["image"], OrderedDict())
+            name = row.get("name") or "Defect 1"
+            defect = defects.setdefault(name, {
+                "name": name,
+                "category": row.get("category") or "",
+                "rename": row.get("rename") or "",
+                "result_text": row.get("result_text") or "",
+                "rectangles": []
+            })
+            defect["rectangles"].append([int(float(row[key])) for key in ("x1", "y1", "x2", "y2")])
+    return [{"image": image, "defects": list(defects.values())} for image, defects in images.items()]
+
+def _make_defect(image_name, defect, number, default_category):
+    """Fill in the defaults the interactive app would use for a defect"""
+    name = defect.get("name") or f"Defect {number}"
+    base_filename, _ = os.path.splitext(os.path.basename(image_name))
+    return Defect.from_dict({
+        "name": name,
+        "category": defect.get("category") or default_category,
+        "rename": defect.get("rename") or f"{base_filename}_{name}",
+        "result_text": defect.get("result_text", ""),
+        "rectangles": defect.get("rectangles", [])
+    })
+
+class BatchRenderer:
+    """
+    Renders annotated images in parallel worker processes (one image per job) and writes the
+    CSV/Excel logs and render index from the main process, like the interactive save does.
+    """
+    def __init__(self, file_manager, workers):
+        # File manager providing output paths, logging, encoder and render index
+        self.file_manager = file_manager
+
+        # Number of worker processes (1 renders in this process)
+        self.workers = workers
+
+        # Counters for the final statistics
+        self.stats = {
+            "images": 0, "defects": 0, "rendered": 0, "reused": 0, "failed": 0,
+            "bytes_read": 0, "bytes_written": 0
+        }
+
+    def run(self, source_folder, images):
+        """
+        Render all annotated images
+
+        Args:
+            source_folder (str): Folder containing the source images
+            images (dict): Image filename -> list of defects
+        """
+        # Annotation-only output does not render, so it runs in this process
+        if self.file_manager.get_setting("output_mode") == "annotations":
+            for image_name, defects in images.items():
+                image_path = os.path.join(source_folder, image_name)
+                if not os.path.exists(image_path):
+                    print(f"Source image not found: {image_name}")
+                    failed = sum(1 for defect in defects if defect.get_rectangle_count())
+                    self._count(failed, 0, 0, failed, 0, 0)
+                    continue
+                saved, total, reused = self.file_manager.save_defects(image_path, image_name, defects, None)
+                self._count(total, saved - reused, reused, total - saved, os.path.getsize(image_path), 0)
+            return
+
+        # Output paths written in this run (two images writing one file would race)
+        claimed = set()
+        jobs = []
+        for image_name, defects in images.items():
+            image_jobs = self._plan_image(source_folder, image_name, defects, claimed)
+            if image_jobs:
+                jobs.append(image_jobs)
+
+        if self.workers <= 1:
+            for image_name, image_path, planned in jobs:
+                try:
+                    result = render_image(image_path, [(defect, info[3]) for defect, info, _ in planned], self.file_manager.encoder)
+                except Exception as e:
+                    print(f"Failed to render {image_name}: {str(e)}")
+                    result = None
+                self._finish_image(image_name, planned, result)
+            return
+
+        # Keep a bounded number of images in flight so memory use stays flat
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = {}
+            queued = iter(jobs)
+            while True:
+                while len(in_flight) < self.workers * 2:
+                    job = next(queued, None)
+                    if job is None:
+                        break
+                    image_name, image_path, planned = job
+                    future = executor.submit(
+                        render_image, image_path, [(defect, info[3]) for defect, info, _ in planned],
+                        self.file_manager.encoder
+                    )
+                    in_flight[future] = (image_name, planned)
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    image_name, planned = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Failed to render {image_name}: {str(e)}")
+                        result = None
+                    self._finish_image(image_name, planned, result)
+
+    def _plan_image(self, source_folder, image_name, defects, claimed):
+        """
+        Work out the outputs of one image, skipping defects that are already up to date
+
+        Returns:
+            tuple or None: (image name, image path, [(defect, output path info, render key)]) if anything needs rendering
+        """
+        file_manager = self.file_manager
+        image_path = os.path.join(source_folder, image_name)
+        source_identity = get_source_identity(image_path)
+        to_save = [defect for defect in defects if defect.get_rectangle_count()]
+        if source_identity is None:
+            print(f"Source image not found: {image_name}")
+            self._count(len(to_save), 0, 0, len(to_save), 0, 0)
+            return None
+
+        planned = []
+        reused = 0
+        failed = 0
+        for defect in to_save:
+            output_path_info = file_manager.get_defect_output_path(defect, image_name)
+            if not output_path_info or output_path_info[3] in claimed:
+                print(f"Skipping defect {defect.name} of {image_name}: missing or duplicate output name")
+                failed += 1
+                continue
+            claimed.add(output_path_info[3])
+            key = file_manager.get_render_key(source_identity, defect, False)
+            if file_manager.render_index.is_current(file_manager.destination_folder, output_path_info[3], key):
+                reused += 1
+                continue
+            planned.append((defect, output_path_info, key))
+
+        self._count(reused + failed, 0, reused, failed, 0, 0)
+        if not planned:
+            return None
+        return image_name, image_path, planned
+
+    def _finish_image(self, image_name, planned, result):
+        """Log the rendered defects of one image"""
+        file_manager = self.file_manager
+        if result is None:
+            self._count(len(planned), 0, 0, len(planned), 0, 0)
+            return
+
+        results, bytes_read = result
+        rendered = 0
+        bytes_written = 0
+        for (defect, output_path_info, key), (rectangles_drawn, seconds, nbytes) in zip(planned, results):
+            if not rectangles_drawn:
+                continue
+            file_manager.encoder_stats.record(file_manager.encoder.profile, seconds, nbytes)
+            file_manager.log_saved_defect(
+                defect, image_name, output_path_info, rectangles_drawn, defect.result_text
+            )
+            file_manager.render_index.record(file_manager.destination_folder, output_path_info[3], key)
+            rendered += 1
+            bytes_written += nbytes
+        self._count(len(planned), rendered, 0, len(planned) - rendered, bytes_read, bytes_written)
+
+    def _count(self, defects, rendered, reused, failed, bytes_read, bytes_written):
+        """Add to the run statistics (images are counted when their source is read)"""
+        self.stats["images"] += 1 if bytes_read else 0
+        self.stats["defects"] += defects
+        self.stats["rendered"] += rendered
+        self.stats["reused"] += reused
+        self.stats["failed"] += failed
+        self.stats["bytes_read"] += bytes_read
+        self.stats["bytes_written"] += bytes_written
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Render annotated defects into the destination's category folders")
+    parser.add_argument("source", help="Folder containing the source images")
+    parser.add_argument("destination", help="Destination base folder")
+    parser.add_argument("--annotations", help="Annotation JSON/CSV file or folder (default: the source folder)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="Worker processes")
+    parser.add_argument("--profile", default="default", choices=sorted(ENCODER_PROFILES), help="Encoder profile")
+    parser.add_argument("--quality", type=int, default=90, help="Quality of the lossy profiles (1-100)")
+    parser.add_argument("--output-mode", default="images", choices=["images", "annotations"], help="Output mode")
+    args = parser.parse_args(argv)
+
+    file_manager = FileManager()
+    file_manager.source_folder = args.source
+    file_manager.destination_folder = args.destination
+    file_manager.settings["output_mode"] = args.output_mode
+    file_manager.configure_encoder(args.profile, args.quality)
+
+    images = load_annotations(args.annotations or args.source, file_manager.get_categories()[0])
+    print(f"Rendering {sum(len(defects) for defects in images.values())} defect(s) of {len(images)} image(s)")
+
+    renderer = BatchRenderer(file_manager, args.workers)
+    start = time.perf_counter()
+    try:
+        renderer.run(args.source, images)
+    finally:
+        # Writes buffered CSV rows and pending Excel rows
+        file_manager.shutdown()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    stats = renderer.stats
+    print(
+        f"Defects: {stats['defects']} ({stats['rendered']} rendered, {stats['reused']} reused, {stats['failed']} failed)"
+    )
+    print(
+        f"Images read: {stats['images']} in {elapsed:.2f}s - {stats['images'] / elapsed:.2f} images/s, "
+        f"{stats['bytes_read'] / elapsed / 1e6:.2f} MB/s read, {stats['bytes_written'] / elapsed / 1e6:.2f} MB/s written"
+    )
+    return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
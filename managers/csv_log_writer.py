@@ -0,0 +1,122 @@
+import os
+import csv
+import threading
+import time
+
+class CsvLogWriter:
+    """
+    Long-lived writer for a CSV log. Keeps the file open, buffers rows and writes them in
+    batches, and reopens the file if it was rotated or removed while the app is running.
+    """
+    def __init__(self, header, max_rows=50, max_delay=2.0):
+        # Column names written once at the top of a new (or emptied) file
+        self.header = header
+
+        # Buffered rows are written once there are max_rows of them or the oldest is max_delay seconds old
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+
+        # Current log file, its open handle and the (device, inode) the handle points to
+        self.path = ""
+        self.file = None
+        self.file_id = None
+
+        # Rows waiting to be written, and the timer that flushes them
+        self.rows = []
+        self.first_row_time = 0
+        self.timer = None
+        self.lock = threading.RLock()
+
+    def set_path(self, path):
+        """Switch to another log file (rows buffered for the previous file are written first)"""
+        with self.lock:
+            if path == self.path:
+                return
+            self.flush()
+            self._close_file()
+            self.path = path
+
+    def write_row(self, row):
+        """Buffer a row, writing the buffer out if a threshold has been reached"""
+        with self.lock:
+            if not self.rows:
+                self.first_row_time = time.monotonic()
+                self._start_timer()
+            self.rows.append(row)
+            if len(self.rows) >= self.max_rows or time.monotonic() - self.first_row_time >= self.max_delay:
+                self.flush()
+
+    def flush(self):
+        """
+        Write all buffered rows to the log file
+
+        Returns:
+            bool: True if the rows were written (they stay buffered after a failure)
+        """
+        with self.lock:
+            self._cancel_timer()
+            if not self.rows or not self.path:
+                return True
+            try:
+                self._open_file()
+                csv_writer = csv.writer(self.file)
+                csv_writer.writerows(self.rows)
+                self.file.flush()
+                self.rows = []
+                return True
+            except OSError as e:
+                print(f"Failed to write CSV log: {str(e)}")
+                self._close_file()
+                self._start_timer()
+                return False
+
+    def close(self):
+        """Write buffered rows and close the file"""
+        with self.lock:
+            self.flush()
+            self._close_file()
+
+    def _open_file(self):
+        """Open the log file for appending, reopening it if it was rotated or removed"""
+        if self.file:
+            try:
+                stat = os.stat(self.path)
+                current_id = (stat.st_dev, stat.st_ino)
+            except OSError:
+                current_id = None
+            if current_id == self.file_id:
+                return
+            # The file we hold was moved away or deleted: continue in a new file at the path
+            self._close_file()
+
+        self.file = open(self.path, 'a', newline='')
+        stat = os.fstat(self.file.fileno())
+        self.file_id = (stat.st_dev, stat.st_ino)
+
+        # Write header if file is new
+        if stat.st_size == 0:
+            csv.writer(self.file).writerow(self.header)
+
+    def _close_file(self):
+        """Close the current file handle"""
+        if self.file:
+            try:
+                self.file.close()
+            except OSError as e:
+                print(f"Failed to close CSV log: {str(e)}")
+        self.file = None
+        self.file_id = None
+
+    def _start_timer(self):
+        """Flush the buffer after max_delay seconds even if no more rows arrive"""
+        if self.timer is None:
+            self.timer = threading.Timer(self.max_delay, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _cancel_timer(self):
+        """Stop the pending flush timer"""
+        if self.timer is not None:
+            # The timer may be the thread running this flush; cancelling it then is harmless
+            self.timer.cancel()
+            self.timer = None
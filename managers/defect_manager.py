@@ -1,4 +1,5 @@
-import copy
+from managers.defect_model import Defect, Rectangle
+from managers.spatial_index import GridIndex
 
 class DefectManager:
     """
@@ -13,54 +14,75 @@ class DefectManager:
         
         # Selected rectangle index within the defect
         self.selected_rectangle_index = -1
+        
+        # Spatial index of all rectangles in image coordinates, for finding the rectangle under the cursor
+        self.spatial_index = GridIndex()
+        
+        # Index key of each rectangle, per defect (in rectangle order); larger keys were added later
+        self.rectangle_keys = {}
+        self.next_key = 0
     
     def add_defect(self, name, rename, category):
         """Add a new defect instance with no rectangles yet"""
-        defect = {
-            "name": name,
-            "rename": rename,
-            "category": category,
-            "rectangles": [],  # List to hold multiple rectangles
-            "result_text": ""  # Add result text field for each defect
-        }
+        defect = Defect(name, rename, category)
         
         self.defects.append(defect)
+        self.rectangle_keys[defect] = []
         return defect
     
     def add_rectangle_to_defect(self, defect_index, coords, canvas_rect=None):
         """Add a rectangle to an existing defect"""
         if 0 <= defect_index < len(self.defects):
-            rectangle = {
-                "coords": coords,
-                "canvas_rect": canvas_rect
-            }
-            self.defects[defect_index]["rectangles"].append(rectangle)
+            defect = self.defects[defect_index]
+            defect.append_rectangle(coords, canvas_rect)
+            self._index_rectangle(defect, defect.get_rectangle_count() - 1, coords)
+            return True
+        return False
+    
+    def insert_rectangle(self, defect_index, rectangle_index, coords):
+        """Put a rectangle back into a defect at an index (used by undo/redo)"""
+        if 0 <= defect_index < len(self.defects):
+            defect = self.defects[defect_index]
+            rectangle_index = min(rectangle_index, defect.get_rectangle_count())
+            defect.insert_rectangle(rectangle_index, coords)
+            self._index_rectangle(defect, rectangle_index, coords)
+            
+            # Keep the selection on the same rectangle
+            if defect_index == self.selected_index and self.selected_rectangle_index >= rectangle_index:
+                self.selected_rectangle_index += 1
             return True
         return False
     
     def get_rectangle(self, defect_index, rectangle_index):
         """Get a specific rectangle from a defect"""
-        if 0 <= defect_index < len(self.defects) and 0 <= rectangle_index < len(self.defects[defect_index]["rectangles"]):
-            return self.defects[defect_index]["rectangles"][rectangle_index]
+        if 0 <= defect_index < len(self.defects) and 0 <= rectangle_index < self.defects[defect_index].get_rectangle_count():
+            defect = self.defects[defect_index]
+            return Rectangle(defect.get_coords(rectangle_index), defect.get_canvas_rect(rectangle_index))
         return None
     
     def get_rectangles_for_defect(self, defect_index):
         """Get all rectangles for a specific defect"""
         if 0 <= defect_index < len(self.defects):
-            return self.defects[defect_index]["rectangles"]
+            defect = self.defects[defect_index]
+            return [
+                Rectangle(coords, canvas_rect)
+                for coords, canvas_rect in zip(defect.iter_coords(), defect.canvas_rects)
+            ]
         return []
     
     def get_rectangle_count_for_defect(self, defect_index):
         """Get the number of rectangles for a specific defect"""
         if 0 <= defect_index < len(self.defects):
-            return len(self.defects[defect_index]["rectangles"])
+            return self.defects[defect_index].get_rectangle_count()
         return 0
     
     def remove_rectangle(self, defect_index, rectangle_index):
         """Remove a rectangle from a defect"""
-        if 0 <= defect_index < len(self.defects) and 0 <= rectangle_index < len(self.defects[defect_index]["rectangles"]):
+        if 0 <= defect_index < len(self.defects) and 0 <= rectangle_index < self.defects[defect_index].get_rectangle_count():
             # Remove the rectangle
-            del self.defects[defect_index]["rectangles"][rectangle_index]
+            defect = self.defects[defect_index]
+            defect.remove_rectangle(rectangle_index)
+            self.spatial_index.remove(self.rectangle_keys[defect].pop(rectangle_index))
             
             # Update selected rectangle index
             if self.selected_rectangle_index == rectangle_index:
@@ -81,13 +103,14 @@ class DefectManager:
         """Get all defects"""
         return self.defects
     
-    def get_defects_copy(self):
-        """Get a deep copy of all defects for history management"""
-        return copy.deepcopy(self.defects)
+    def get_defects_snapshot(self):
+        """Get a copy of all defects for saving in the background (without canvas item ids)"""
+        return [defect.copy() for defect in self.defects]
     
     def set_defects(self, defects):
         """Replace all defects with a new set"""
         self.defects = defects
+        self._rebuild_index()
         self.selected_index = -1
         self.selected_rectangle_index = -1
     
@@ -98,7 +121,9 @@ class DefectManager:
     def remove_defect(self, index):
         """Remove a defect by index"""
         if 0 <= index < len(self.defects):
-            # Remove the defect
+            # Remove the defect and its rectangles from the spatial index
+            for key in self.rectangle_keys.pop(self.defects[index], []):
+                self.spatial_index.remove(key)
             del self.defects[index]
             
             # Update selected index
@@ -108,9 +133,21 @@ class DefectManager:
             elif self.selected_index > index:
                 self.selected_index -= 1
     
+    def insert_defect(self, index, defect):
+        """Put a defect back at an index (used by undo/redo)"""
+        self.defects.insert(index, defect)
+        self.rectangle_keys[defect] = []
+        for rectangle_index, coords in enumerate(defect.iter_coords()):
+            self._index_rectangle(defect, rectangle_index, coords)
+        
+        # Keep the selection on the same defect
+        if self.selected_index >= index:
+            self.selected_index += 1
+    
     def clear_defects(self):
         """Remove all defects"""
         self.defects = []
+        self._rebuild_index()
         self.selected_index = -1
         self.selected_rectangle_index = -1
     
@@ -119,11 +156,11 @@ class DefectManager:
         if 0 <= index < len(self.defects):
             self.selected_index = index
             # Reset rectangle selection when selecting a new defect
-            self.selected_rectangle_index = -1 if len(self.defects[index]["rectangles"]) == 0 else 0
+            self.selected_rectangle_index = -1 if self.defects[index].get_rectangle_count() == 0 else 0
     
     def select_rectangle(self, rectangle_index):
         """Select a specific rectangle within the selected defect"""
-        if self.selected_index >= 0 and 0 <= rectangle_index < len(self.defects[self.selected_index]["rectangles"]):
+        if self.selected_index >= 0 and 0 <= rectangle_index < self.defects[self.selected_index].get_rectangle_count():
             self.selected_rectangle_index = rectangle_index
             return True
         return False
@@ -150,14 +187,56 @@ class DefectManager:
     def get_selected_rectangle(self):
         """Get the selected rectangle within the selected defect"""
         defect = self.get_selected_defect()
-        if defect and self.selected_rectangle_index >= 0 and self.selected_rectangle_index < len(defect["rectangles"]):
-            return defect["rectangles"][self.selected_rectangle_index]
+        if defect and self.selected_rectangle_index >= 0 and self.selected_rectangle_index < defect.get_rectangle_count():
+            return Rectangle(
+                defect.get_coords(self.selected_rectangle_index), defect.get_canvas_rect(self.selected_rectangle_index)
+            )
         return None
     
     def update_selected_defect_property(self, property_name, value):
         """Update a property of the selected defect"""
         if self.selected_index >= 0 and property_name:
             defect = self.defects[self.selected_index]
-            defect[property_name] = value
+            setattr(defect, property_name, value)
+            return True
+        return False
+    
+    def set_defect_property(self, index, property_name, value):
+        """Set a property of a defect by index"""
+        if 0 <= index < len(self.defects) and property_name:
+            setattr(self.defects[index], property_name, value)
             return True
-        return False 
\ No newline at end of file
+        return False
+    
+    def find_rectangle_at(self, x, y):
+        """
+        Find the topmost rectangle at a point in image coordinates, across all defects
+        
+        Rectangles of the selected defect (the ones drawn on the canvas) come first; among the
+        others, the most recently added rectangle is on top.
+        
+        Returns:
+            tuple or None: (defect index, rectangle index), or None if no rectangle contains the point
+        """
+        hits = self.spatial_index.query_point(x, y)
+        if not hits:
+            return None
+        selected_defect = self.get_selected_defect()
+        key, defect = max(hits, key=lambda hit: (hit[1] is selected_defect, hit[0]))
+        return self.defects.index(defect), self.rectangle_keys[defect].index(key)
+    
+    def _index_rectangle(self, defect, rectangle_index, coords):
+        """Add a rectangle of a defect to the spatial index"""
+        key = self.next_key
+        self.next_key += 1
+        self.rectangle_keys.setdefault(defect, []).insert(rectangle_index, key)
+        self.spatial_index.insert(key, coords, defect)
+    
+    def _rebuild_index(self):
+        """Index the rectangles of all defects from scratch"""
+        self.spatial_index.clear()
+        self.rectangle_keys = {}
+        for defect in self.defects:
+            self.rectangle_keys[defect] = []
+            for rectangle_index, coords in enumerate(defect.iter_coords()):
+                self._index_rectangle(defect, rectangle_index, coords)
@@ -0,0 +1,153 @@
+import sys
+from array import array
+
+class Rectangle:
+    """A rectangle of a defect as returned by DefectManager (a copy; the defect owns the data)"""
+    __slots__ = ("coords", "canvas_rect")
+
+    def __init__(self, coords, canvas_rect=None):
+        # Image coordinates (x1, y1, x2, y2) and the canvas item showing the rectangle
+        self.coords = coords
+        self.canvas_rect = canvas_rect
+
+class Defect:
+    """
+    A defect marked on an image. Its rectangles are stored as one contiguous int32 array of
+    x1, y1, x2, y2 values (four per rectangle), so they can be copied, clipped and serialized in bulk.
+    """
+    __slots__ = ("name", "rename", "category", "result_text", "coords", "canvas_rects")
+
+    def __init__(self, name, rename, category, result_text="", coords=()):
+        self.name = name
+        self.rename = rename
+        self.category = category
+        self.result_text = result_text
+
+        # Rectangle coordinates (N x 4, row-major) and the canvas item of each rectangle
+        self.coords = array('i', coords)
+        self.canvas_rects = [None] * (len(self.coords) // 4)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a defect from its serialized form (see to_dict)"""
+        coords = array('i')
+        for rectangle in data.get("rectangles", []):
+            coords.extend(int(value) for value in rectangle)
+        return cls(
+            data.get("name", ""), data.get("rename", ""), data.get("category", ""),
+            data.get("result_text", ""), coords
+        )
+
+    def to_dict(self):
+        """Get the defect in a JSON-serializable form (rectangles as [x1, y1, x2, y2] lists)"""
+        return {
+            "name": self.name,
+            "rename": self.rename,
+            "category": self.category,
+            "result_text": self.result_text,
+            "rectangles": self.get_rectangle_lists()
+        }
+
+    def copy(self):
+        """Copy the defect without its canvas items (the coordinates are copied in one block)"""
+        return Defect(self.name, self.rename, self.category, self.result_text, self.coords)
+
+    def get_rectangle_count(self):
+        """Get the number of rectangles"""
+        return len(self.canvas_rects)
+
+    def get_coords(self, index):
+        """Get the (x1, y1, x2, y2) coordinates of a rectangle"""
+        start = index * 4
+        return tuple(self.coords[start:start + 4])
+
+    def iter_coords(self):
+        """Iterate over the (x1, y1, x2, y2) coordinates of all rectangles"""
+        coords = self.coords
+        for start in range(0, len(coords), 4):
+            yield coords[start], coords[start + 1], coords[start + 2], coords[start + 3]
+
+    def get_rectangle_lists(self):
+        """Get the coordinates of all rectangles as [x1, y1, x2, y2] lists"""
+        coords = self.coords.tolist()
+        return [coords[start:start + 4] for start in range(0, len(coords), 4)]
+
+    def insert_rectangle(self, index, coords, canvas_rect=None):
+        """Insert a rectangle at an index (appended if the index is past the end)"""
+        index = min(index, len(self.canvas_rects))
+        start = index * 4
+        self.coords[start:start] = array('i', coords)
+        self.canvas_rects.insert(index, canvas_rect)
+
+    def append_rectangle(self, coords, canvas_rect=None):
+        """Add a rectangle at the end"""
+        self.coords.extend(coords)
+        self.canvas_rects.append(canvas_rect)
+
+    def remove_rectangle(self, index):
+        """
+        Remove a rectangle
+
+        Returns:
+            tuple: The coordinates of the removed rectangle
+        """
+        coords = self.get_coords(index)
+        start = index * 4
+        del self.coords[start:start + 4]
+        del self.canvas_rects[index]
+        return coords
+
+    def get_canvas_rect(self, index):
+        """Get the canvas item of a rectangle"""
+        return self.canvas_rects[index]
+
+    def set_canvas_rect(self, index, canvas_rect):
+        """Set the canvas item of a rectangle"""
+        self.canvas_rects[index] = canvas_rect
+
+    def clear_canvas_rects(self):
+        """Forget the canvas items (when the image is no longer displayed)"""
+        self.canvas_rects = [None] * len(self.canvas_rects)
+
+    def get_clipped_boxes(self, width, height):
+        """
+        Get the rectangles ordered (x1 <= x2, y1 <= y2) and clamped to an image's bounds
+
+        Args:
+            width (int): Width of the image
+            height (int): Height of the image
+
+        Returns:
+            list: (x1, y1, x2, y2) boxes
+        """
+        max_x = width - 1
+        max_y = height - 1
+        boxes = []
+        for x1, y1, x2, y2 in self.iter_coords():
+            if x1 > x2:
+                x1, x2 = x2, x1
+            if y1 > y2:
+                y1, y2 = y2, y1
+            boxes.append((
+                max(0, min(x1, max_x)), max(0, min(y1, max_y)),
+                max(0, min(x2, max_x)), max(0, min(y2, max_y))
+            ))
+        return boxes
+
+    def get_size(self):
+        """Estimate the memory of the defect in bytes"""
+        return (
+            sys.getsizeof(self) + sys.getsizeof(self.coords) + sys.getsizeof(self.canvas_rects)
+            + sys.getsizeof(self.name) + sys.getsizeof(self.rename) + sys.getsizeof(self.category)
+            + sys.getsizeof(self.result_text)
+        )
+
+    def __getstate__(self):
+        # Canvas items are only meaningful in the process that drew them
+        return self.name, self.rename, self.category, self.result_text, self.coords.tobytes()
+
+    def __setstate__(self, state):
+        self.name, self.rename, self.category, self.result_text, coords = state
+        self.coords = array('i')
+        self.coords.frombytes(coords)
+        self.canvas_rects = [None] * (len(self.coords) // 4)
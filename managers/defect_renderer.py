@@ -0,0 +1,69 @@
+from PIL import ImageDraw
+
+# Defect highlight colors (semi-transparent fill, opaque outline)
+DEFECT_FILL = (255, 255, 0, 90)
+DEFECT_OUTLINE = (255, 255, 0, 255)
+
+def prepare_base_image(original_image):
+    """Convert an image to a mode the defect highlights can be drawn on (RGB or RGBA)"""
+    if original_image.mode != 'RGBA' and original_image.mode != 'RGB':
+        return original_image.convert('RGBA')
+    return original_image
+
+def get_defect_boxes(defect, image_size):
+    """
+    Get the sanitized rectangles of a defect
+
+    Args:
+        defect (Defect): Defect with its rectangles
+        image_size (tuple): Width and height of the image the defect is drawn on
+
+    Returns:
+        list: (x1, y1, x2, y2) boxes, ordered and clamped to the image bounds
+    """
+    return defect.get_clipped_boxes(*image_size)
+
+class OverlayCompositor:
+    """
+    Draws the defects of one image. The base image is converted and copied once per image;
+    each defect is drawn in place, saved, and the touched regions are restored afterwards.
+    """
+    def __init__(self, original_image):
+        # Private drawable copy of the image (cached images are shared and must not be modified)
+        self.base_image = prepare_base_image(original_image)
+        if self.base_image is original_image:
+            self.base_image = original_image.copy()
+
+    def save_defect(self, defect, output_path, encoder, boxes=None):
+        """
+        Save the image with one defect's rectangles drawn on it
+
+        Args:
+            defect (Defect): Defect with its rectangles
+            output_path (str): Path of the file to write
+            encoder (ImageEncoder): Encoder profile used to write the file
+            boxes (list): Sanitized rectangles if already computed (see get_defect_boxes)
+
+        Returns:
+            tuple: (rectangles drawn, seconds spent encoding, bytes written); (0, 0, 0) if nothing was saved
+        """
+        if boxes is None:
+            boxes = get_defect_boxes(defect, self.base_image.size)
+        if not boxes:
+            return 0, 0, 0
+
+        # Keep the pixels under each rectangle; overlapping rectangles are restored in reverse order.
+        # The region is padded by one pixel: Pillow paints outside the box for zero-width or -height boxes.
+        width, height = self.base_image.size
+        backups = []
+        draw = ImageDraw.Draw(self.base_image, 'RGBA')  # Use RGBA mode for transparency
+        try:
+            for x1, y1, x2, y2 in boxes:
+                region = (max(0, x1 - 1), max(0, y1 - 1), min(width, x2 + 2), min(height, y2 + 2))
+                backups.append((region, self.base_image.crop(region)))
+                draw.rectangle([x1, y1, x2, y2], fill=DEFECT_FILL, outline=DEFECT_OUTLINE)
+            seconds, nbytes = encoder.save(self.base_image, output_path)
+        finally:
+            for region, backup in reversed(backups):
+                self.base_image.paste(backup, region[:2])
+        return len(boxes), seconds, nbytes
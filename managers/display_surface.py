@@ -0,0 +1,44 @@
+from collections import OrderedDict
+from PIL import ImageTk
+
+class DisplaySurface:
+    """
+    Reusable PhotoImage buffers for the displayed image. New frames are pasted into an
+    existing buffer of the same size instead of allocating a new Tk image every time.
+    """
+    def __init__(self, max_buffers=4):
+        # Maximum number of buffers kept (one per displayed size)
+        self.max_buffers = max_buffers
+
+        # (photo mode, size) -> PhotoImage, least recently used first
+        self.buffers = OrderedDict()
+
+    def show(self, image):
+        """
+        Write an image into the buffer for its size
+
+        Args:
+            image (Image): Frame to display
+
+        Returns:
+            PhotoImage: The buffer now holding the frame's pixels
+        """
+        # Tk photo images are either RGB or RGBA
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        key = ("RGBA" if has_alpha else "RGB", image.size)
+
+        photo = self.buffers.get(key)
+        if photo is None:
+            photo = ImageTk.PhotoImage(key[0], image.size)
+            self.buffers[key] = photo
+            while len(self.buffers) > self.max_buffers:
+                self.buffers.popitem(last=False)
+        else:
+            self.buffers.move_to_end(key)
+
+        photo.paste(image)
+        return photo
+
+    def clear(self):
+        """Release all buffers"""
+        self.buffers.clear()
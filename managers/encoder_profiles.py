@@ -0,0 +1,113 @@
+import os
+import time
+import threading
+from PIL import features
+
+# Named output encoder profiles: Pillow format, file extension and save parameters.
+# "default" keeps the source file's extension and Pillow's default settings.
+ENCODER_PROFILES = {
+    "default": {"format": None, "extension": None},
+    "fast-png": {"format": "PNG", "extension": ".png"},
+    "archival-png": {"format": "PNG", "extension": ".png"},
+    "webp-lossless": {"format": "WEBP", "extension": ".webp"},
+    "webp-lossy": {"format": "WEBP", "extension": ".webp"},
+    "jpeg": {"format": "JPEG", "extension": ".jpg"}
+}
+
+class ImageEncoder:
+    """
+    Saves output images with a named encoder profile. Plain attributes only, so it can be
+    passed to worker processes.
+    """
+    def __init__(self, profile="default", quality=90):
+        # Unknown profiles and formats this Pillow build cannot write fall back to the default
+        if profile not in ENCODER_PROFILES:
+            print(f"Unknown encoder profile '{profile}', using 'default'")
+            profile = "default"
+        if ENCODER_PROFILES[profile]["format"] == "WEBP" and not features.check("webp"):
+            print(f"Encoder profile '{profile}' needs Pillow with WebP support, using 'default'")
+            profile = "default"
+        self.profile = profile
+
+        # Quality (1-100) of the lossy profiles
+        self.quality = max(1, min(100, int(quality)))
+
+    def get_extension(self, original_filename):
+        """Get the extension of output files (the source extension for the default profile)"""
+        extension = ENCODER_PROFILES[self.profile]["extension"]
+        if extension:
+            return extension
+        _, extension = os.path.splitext(original_filename)
+        return extension
+
+    def get_save_params(self):
+        """Get the keyword arguments passed to Image.save for this profile"""
+        if self.profile == "fast-png":
+            return {"compress_level": 1}
+        if self.profile == "archival-png":
+            return {"optimize": True}
+        if self.profile == "webp-lossless":
+            return {"lossless": True}
+        if self.profile == "webp-lossy":
+            return {"quality": self.quality}
+        if self.profile == "jpeg":
+            return {"quality": self.quality, "optimize": True}
+        return {}
+
+    def save(self, image, path):
+        """
+        Encode an image to a file
+
+        Returns:
+            tuple: (seconds spent encoding, bytes written)
+        """
+        image_format = ENCODER_PROFILES[self.profile]["format"]
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            # JPEG has no alpha channel
+            image = image.convert("RGB")
+
+        # Encode to a temporary file and move it over the target: an existing output may be a hard
+        # link to a source image (see file_transfer.link_or_copy), and writing into it would change the source
+        base, extension = os.path.splitext(path)
+        temp_path = f"{base}.{os.getpid()}.tmp{extension}"
+        start = time.perf_counter()
+        try:
+            image.save(temp_path, image_format, **self.get_save_params())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        seconds = time.perf_counter() - start
+        return seconds, os.path.getsize(path)
+
+class EncoderStats:
+    """
+    Encode time and bytes written per encoder profile, for choosing a profile that fits
+    the throughput and storage budget.
+    """
+    def __init__(self):
+        # Profile name -> {"images", "seconds", "bytes"}
+        self.profiles = {}
+        self.lock = threading.Lock()
+
+    def record(self, profile, seconds, nbytes):
+        """Add one encoded image to the statistics of a profile"""
+        with self.lock:
+            stats = self.profiles.setdefault(profile, {"images": 0, "seconds": 0.0, "bytes": 0})
+            stats["images"] += 1
+            stats["seconds"] += seconds
+            stats["bytes"] += nbytes
+
+    def get_stats(self):
+        """Get the totals and per-image averages of every profile used"""
+        with self.lock:
+            result = {}
+            for profile, stats in self.profiles.items():
+                images = stats["images"]
+                result[profile] = dict(
+                    stats,
+                    seconds_per_image=stats["seconds"] / images,
+                    bytes_per_image=stats["bytes"] // images
+                )
+            return result
@@ -1,14 +1,38 @@
 import os
+import json
+import threading
 import openpyxl
 from openpyxl import Workbook
 
 class ExcelManager:
     """
     Manager for all Excel-related operations including creating, updating, and formatting Excel files.
+    Rows are appended to workbooks kept open in memory and written to disk in batches; rows not yet
+    written are kept in a journal next to the workbook so they survive a crash.
     """
-    def __init__(self):
+    def __init__(self, max_rows=200, max_delay=30.0):
         # Default filename for Excel output
         self.default_excel_filename = "ui_defects.xlsx"
+        
+        # Suffix of the journal of rows not yet written to a workbook
+        self.journal_suffix = ".journal"
+        
+        # Workbooks are saved once a file has max_rows new rows or the oldest is max_delay seconds old
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        
+        # Open workbooks: Excel path -> (workbook, worksheet, file signature after our last save)
+        self.workbooks = {}
+        
+        # Rows waiting to be written: Excel path -> list of rows
+        self.pending_rows = {}
+        
+        # Open journal files: Excel path -> file object
+        self.journals = {}
+        
+        # Timer that saves pending rows, and a lock as rows arrive from the save worker
+        self.timer = None
+        self.lock = threading.RLock()
     
     def create_or_load_workbook(self, file_path):
         """Create a new workbook or load an existing one"""
@@ -27,7 +51,7 @@ class ExcelManager:
     
     def save_defect_result(self, category_folder, filename, result_text):
         """
-        Save defect result to Excel file
+        Save defect result to Excel file (the row is journaled now and written with the next batch)
         
         Args:
             category_folder (str): Path to the category folder
@@ -41,21 +65,161 @@ class ExcelManager:
         
         # Strip the file extension to save only the base filename
         base_filename, _ = os.path.splitext(filename)
+        row = [base_filename, "", result_text, ""]
         
         try:
-            # Get workbook and worksheet
-            wb, ws = self.create_or_load_workbook(excel_path)
-            
-            # Append data to the worksheet
-            ws.append([base_filename, "", result_text, ""])
-            
-            # Save the workbook
-            wb.save(excel_path)
+            with self.lock:
+                # Rows left in the journal by a previous session are written with the next batch
+                # (if the workbook cannot be written yet, they are retried like any pending row)
+                if excel_path not in self.journals:
+                    recovered = self.recover_journal(excel_path)
+                    self.journals[excel_path] = open(excel_path + self.journal_suffix, 'a', encoding='utf-8')
+                    if recovered:
+                        self.pending_rows.setdefault(excel_path, [])[:0] = recovered
+                
+                journal = self.journals[excel_path]
+                journal.write(json.dumps(row) + "\n")
+                journal.flush()
+                
+                rows = self.pending_rows.setdefault(excel_path, [])
+                rows.append(row)
+                if len(rows) >= self.max_rows:
+                    return self.flush(excel_path)
+                self._start_timer()
             return True
         except Exception as e:
             print(f"Failed to update Excel file: {str(e)}")
             return False
     
+    def flush(self, excel_path=None):
+        """
+        Write pending rows to their workbooks
+        
+        Args:
+            excel_path (str): Only write the rows of this file (default: all files)
+            
+        Returns:
+            bool: True if all rows were written
+        """
+        with self.lock:
+            paths = [excel_path] if excel_path else list(self.pending_rows)
+            success = True
+            for path in paths:
+                rows = self.pending_rows.get(path)
+                if not rows:
+                    continue
+                try:
+                    self._append_rows(path, rows)
+                    del self.pending_rows[path]
+                    
+                    # Everything in the journal is in the workbook now
+                    self.journals[path].truncate(0)
+                    self.journals[path].seek(0)
+                except Exception as e:
+                    print(f"Failed to update Excel file: {str(e)}")
+                    # Reload from disk on the next attempt
+                    self.workbooks.pop(path, None)
+                    success = False
+            
+            if self.pending_rows:
+                self._start_timer()
+            return success
+    
+    def close(self):
+        """Write all pending rows and release workbooks and journals (end of the session)"""
+        with self.lock:
+            self._cancel_timer()
+            success = self.flush()
+            self._cancel_timer()
+            for path, journal in self.journals.items():
+                journal.close()
+                # Journals are only kept while they hold unwritten rows
+                if success and os.path.exists(path + self.journal_suffix):
+                    os.remove(path + self.journal_suffix)
+            self.journals.clear()
+            self.workbooks.clear()
+            return success
+    
+    def recover_journal(self, excel_path):
+        """
+        Read rows left in the journal of a workbook by a session that did not finish
+        
+        Returns:
+            list: The rows, which stay in the journal until they are written to the workbook
+        """
+        journal_path = excel_path + self.journal_suffix
+        if not os.path.exists(journal_path):
+            return []
+        
+        with open(journal_path, 'r', encoding='utf-8') as journal:
+            text = journal.read()
+        
+        # A crash while writing can leave a partial last line
+        rows = []
+        damaged = bool(text) and not text.endswith("\n")
+        for line in text.splitlines():
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                print(f"Skipping damaged journal line in {journal_path}")
+                damaged = True
+        
+        # Rewrite a damaged journal so new rows are not appended to a partial line
+        if damaged:
+            temp_path = journal_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as journal:
+                for row in rows:
+                    journal.write(json.dumps(row) + "\n")
+            os.replace(temp_path, journal_path)
+        
+        if rows:
+            print(f"Recovering {len(rows)} unsaved Excel row(s) for {excel_path}")
+        return rows
+    
+    def _append_rows(self, excel_path, rows):
+        """Append rows to a workbook and save it (reloading it if it was changed outside the app)"""
+        entry = self.workbooks.get(excel_path)
+        if entry is None or entry[2] != self._get_signature(excel_path):
+            wb, ws = self.create_or_load_workbook(excel_path)
+        else:
+            wb, ws, _ = entry
+        
+        for row in rows:
+            ws.append(row)
+        
+        # Write to a temporary file first so a crash never leaves a truncated workbook
+        temp_path = excel_path + ".tmp"
+        wb.save(temp_path)
+        os.replace(temp_path, excel_path)
+        self.workbooks[excel_path] = (wb, ws, self._get_signature(excel_path))
+    
+    def _get_signature(self, excel_path):
+        """Get the (modification time, size) of a workbook file, or None if it does not exist"""
+        try:
+            stat = os.stat(excel_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def _start_timer(self):
+        """Write pending rows after max_delay seconds"""
+        if self.timer is None:
+            self.timer = threading.Timer(self.max_delay, self._on_timer)
+            self.timer.daemon = True
+            self.timer.start()
+    
+    def _cancel_timer(self):
+        """Stop the pending save timer"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+    
+    def _on_timer(self):
+        """Scheduled save of pending rows"""
+        with self.lock:
+            self.timer = None
+            self.flush()
+    
     def generate_summary_report(self, base_folder):
         """
         Generate a summary report Excel file with statistics from all categories
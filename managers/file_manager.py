@@ -1,12 +1,20 @@
 import os
 import json
-import csv
 from datetime import datetime
-from tkinter import filedialog
-from PIL import Image, ImageDraw
+from PIL import Image
 import openpyxl
 from openpyxl import Workbook
 from managers.excel_manager import ExcelManager
+from managers.folder_scanner import FolderScanner
+from managers.folder_watcher import FolderWatcher
+from managers.defect_renderer import OverlayCompositor, get_defect_boxes
+from managers.render_pool import RenderPool
+from managers.csv_log_writer import CsvLogWriter
+from managers.encoder_profiles import ImageEncoder, EncoderStats
+from managers.annotation_output import AnnotationWriter, ANNOTATION_EXTENSION
+from managers.file_transfer import link_or_copy
+from managers.render_index import RenderIndex, make_render_key, get_source_identity
+from managers.defect_model import Defect
 
 class FileManager:
     """
@@ -20,11 +28,59 @@ class FileManager:
         # Categories
         self.categories = ["Bug for current Project", "Bug for other Project", "No defects found"]
         
+        # Category of images filed without any defects
+        self.no_defects_category = "No defects found"
+        
         # Configuration file
         self.config_file = "bug_validator_config.json"
         
+        # Tunable settings stored in the configuration file, with their defaults
+        self.default_settings = {
+            "prefetch_ahead": 2,  # Images decoded in the background after the current one
+            "prefetch_behind": 1,  # Images decoded in the background before the current one
+            "image_cache_mb": 512,  # Memory budget for decoded images kept for navigation
+            "frame_cache_mb": 64,  # Memory budget for resized frames kept per zoom level
+            "watch_source_folder": True,  # Pick up images added to or removed from the source folder
+            "watch_poll_seconds": 1.0,  # Polling interval when inotify is not available
+            "parallel_render": True,  # Encode the images of several defects in parallel processes
+            "encoder_profile": "default",  # Output format: default, fast-png, archival-png, webp-lossless, webp-lossy, jpeg
+            "encoder_quality": 90,  # Quality of the webp-lossy and jpeg profiles (1-100)
+            "output_mode": "images",  # "images" saves highlighted images, "annotations" saves JSON sidecars
+            "undo_history_kb": 1024,  # Memory budget for the undo history of the current image
+            "annotation_sessions_mb": 16  # Memory budget for the defects and undo history of visited images
+        }
+        self.settings = dict(self.default_settings)
+        
         # Create Excel Manager
         self.excel_manager = ExcelManager()
+        
+        # Supported image extensions
+        self.image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+        
+        # Background scanner for large source folders
+        self.folder_scanner = FolderScanner(self.image_extensions)
+        
+        # Watches the source folder for new and deleted images
+        self.folder_watcher = FolderWatcher(self.image_extensions)
+        
+        # Worker processes encoding the defect images of one source image in parallel
+        self.render_pool = RenderPool()
+        
+        # Output encoder profile and its encode time / size statistics
+        self.encoder = ImageEncoder()
+        self.encoder_stats = EncoderStats()
+        
+        # Annotation-only output (originals stored once plus one JSON sidecar per defect)
+        self.annotation_writer = AnnotationWriter()
+        
+        # Outputs already written to the destination, so identical saves are skipped
+        self.render_index = RenderIndex()
+        
+        # Buffered writer for validation_log.csv in the destination folder
+        self.csv_log = CsvLogWriter([
+            "Date", "Time", "Original Filename", "New Filename", "Category", 
+            "Defect Name", "Rectangle Count in Defect"
+        ])
     
     def load_config(self):
         """Load configuration from file"""
@@ -35,6 +91,11 @@ class FileManager:
                     config = json.load(f)
                     self.source_folder = config.get('source_folder', '')
                     self.destination_folder = config.get('destination_folder', '')
+                    
+                    # Override default settings with any saved values
+                    for key in self.default_settings:
+                        if key in config:
+                            self.settings[key] = config[key]
         except Exception as e:
             print(f"Error loading config: {e}")
         
@@ -52,6 +113,7 @@ class FileManager:
                 'source_folder': self.source_folder,
                 'destination_folder': self.destination_folder
             }
+            config.update(self.settings)
             with open(self.config_file, 'w') as f:
                 json.dump(config, f)
             return True
@@ -59,8 +121,22 @@ class FileManager:
             print(f"Error saving config: {e}")
             return False
     
+    def get_setting(self, name):
+        """Get the value of a tunable setting"""
+        return self.settings.get(name, self.default_settings.get(name))
+    
+    def configure_encoder(self, profile, quality):
+        """Select the encoder profile used for saved images"""
+        self.encoder = ImageEncoder(profile, quality)
+    
+    def get_encoder_stats(self):
+        """Get encode time and bytes written per encoder profile"""
+        return self.encoder_stats.get_stats()
+    
     def select_source_folder(self):
         """Open dialog to select source folder"""
+        # Imported here so the file manager also works headless (batch rendering)
+        from tkinter import filedialog
         folder = filedialog.askdirectory(title="Select Source Folder with Images")
         if folder:
             self.source_folder = folder
@@ -69,6 +145,7 @@ class FileManager:
     
     def select_destination_folder(self):
         """Open dialog to select destination folder and create category folders"""
+        from tkinter import filedialog
         folder = filedialog.askdirectory(title="Select Destination Base Folder")
         if folder:
             self.destination_folder = folder
@@ -94,126 +171,358 @@ class FileManager:
         if not self.source_folder:
             return []
         
-        # Supported image extensions
-        image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
-        
         # Get files with supported extensions
         image_files = [f for f in os.listdir(self.source_folder) 
-                      if f.lower().endswith(image_extensions)]
+                      if f.lower().endswith(self.image_extensions)]
         
         return image_files
     
-    def save_image_with_defect(self, original_image, defect, original_filename, result_text=""):
-        """Save an image with the specified defect (containing multiple rectangles)"""
-        if not original_image or not defect:
-            print(f"Missing original image or defect data")
-            return False
-        
-        # Check if the defect has any rectangles
-        if not defect.get("rectangles") or len(defect["rectangles"]) == 0:
-            print(f"No rectangles found in defect: {defect['name']}")
-            return False
+    def scan_image_files(self, on_batch):
+        """
+        Start listing the image files of the source folder in the background
         
-        # Log defect details for debugging
-        print(f"Saving defect: {defect['name']}, Category: {defect['category']}, Rectangle count: {len(defect['rectangles'])}")
-        
-        # Create a copy of the original image to draw on
-        output_image = original_image.copy()
-        
-        # Check if the image supports transparency
-        if output_image.mode != 'RGBA' and output_image.mode != 'RGB':
-            output_image = output_image.convert('RGBA')
+        Args:
+            on_batch (callable): Called from the scan thread as on_batch(filenames, done)
             
-        draw = ImageDraw.Draw(output_image, 'RGBA')  # Use RGBA mode for transparency
+        Returns:
+            bool: True if the scan was started
+        """
+        if not self.source_folder:
+            return False
+        self.folder_scanner.start(self.source_folder, on_batch)
+        return True
+    
+    def stop_scanning(self):
+        """Stop a source folder scan in progress"""
+        self.folder_scanner.stop()
+    
+    def watch_source_folder(self, on_change):
+        """
+        Start watching the source folder for added and removed image files
         
-        # Draw all rectangles for this defect
-        rectangles_drawn = 0
-        for i, rectangle in enumerate(defect["rectangles"]):
-            # Get the rectangle coordinates
-            coords = rectangle["coords"]
-            
-            # Log rectangle info for debugging
-            print(f"Processing rectangle {i+1} with coords: {coords}")
-            
-            # Ensure coords are in the correct format and contain valid values
-            if not coords or len(coords) != 4:
-                print(f"Invalid coordinates: {coords}")
-                continue
-                
-            # Ensure the coordinates are properly ordered (x1 < x2, y1 < y2)
-            x1, y1, x2, y2 = coords
-            x1, x2 = min(x1, x2), max(x1, x2)
-            y1, y2 = min(y1, y2), max(y1, y2)
-            
-            # Ensure coordinates are within the image bounds
-            img_width, img_height = original_image.size
-            x1 = max(0, min(x1, img_width-1))
-            y1 = max(0, min(y1, img_height-1))
-            x2 = max(0, min(x2, img_width-1))
-            y2 = max(0, min(y2, img_height-1))
+        Args:
+            on_change (callable): Called from the watch thread as on_change(added, removed)
             
-            # Draw the rectangle with sanitized coordinates
-            draw.rectangle([x1, y1, x2, y2], fill=(255, 255, 0, 90), outline=(255, 255, 0, 255))
-            rectangles_drawn += 1
-        
-        # If no rectangles were drawn, return false
-        if rectangles_drawn == 0:
+        Returns:
+            bool: True if the watch was started
+        """
+        self.folder_watcher.stop()
+        if not self.source_folder or not self.get_setting("watch_source_folder"):
             return False
+        self.folder_watcher.poll_interval = self.get_setting("watch_poll_seconds")
+        self.folder_watcher.start(self.source_folder, on_change)
+        return True
+    
+    def stop_watching(self):
+        """Stop watching the source folder"""
+        self.folder_watcher.stop()
+    
+    def flush_logs(self):
+        """Write buffered log rows to disk"""
+        self.csv_log.flush()
+    
+    def shutdown(self):
+        """Stop background workers and close the logs"""
+        self.render_pool.shutdown()
+        self.csv_log.close()
+        if self.encoder_stats.profiles:
+            print(f"Encoder stats: {self.get_encoder_stats()}")
+        self.excel_manager.close()
+        self.render_index.close()
+    
+    def get_defect_output_path(self, defect, original_filename, ext=None):
+        """
+        Get where the image of a defect is saved, creating its category folder
         
-        # CSV log path
-        csv_path = os.path.join(self.destination_folder, "validation_log.csv")
-        csv_exists = os.path.exists(csv_path)
+        Args:
+            ext (str): Extension of the output file (default: the encoder profile's extension)
         
+        Returns:
+            tuple or None: (category folder, new filename without extension, extension, full path),
+            or None if the defect has no rename
+        """
         # Get category and create path
-        category = defect["category"]
+        category = defect.category
         category_folder = os.path.join(self.destination_folder, category.replace(" ", "_"))
         
         # Create the folder if it doesn't exist
         os.makedirs(category_folder, exist_ok=True)
         
         # Get new filename for this defect
-        new_filename = defect["rename"]
+        new_filename = defect.rename
         if not new_filename:
+            return None
+        
+        # Add extension from the encoder profile (the original file's for the default profile)
+        if ext is None:
+            ext = self.encoder.get_extension(original_filename)
+        return category_folder, new_filename, ext, os.path.join(category_folder, new_filename + ext)
+    
+    def log_saved_defect(self, defect, original_filename, output_path_info, rectangles_drawn, result_text=""):
+        """Record a saved defect image in the CSV log and the category's Excel file"""
+        category_folder, new_filename, ext, _ = output_path_info
+        
+        # Record in CSV log (buffered; the writer keeps the file open)
+        self.csv_log.set_path(os.path.join(self.destination_folder, "validation_log.csv"))
+        now = datetime.now()
+        # Get base filename without extension for both original and new filenames
+        original_base_filename, _ = os.path.splitext(original_filename)
+        self.csv_log.write_row([
+            now.strftime("%Y-%m-%d"),
+            now.strftime("%H:%M:%S"),
+            original_base_filename,
+            new_filename,  # Already without extension
+            defect.category,
+            defect.name,
+            rectangles_drawn  # Number of rectangles actually drawn
+        ])
+        
+        # Update Excel file with results using the Excel Manager
+        self.excel_manager.save_defect_result(category_folder, new_filename + ext, result_text)
+    
+    def save_image_with_defect(self, original_image, defect, original_filename, result_text="", compositor=None):
+        """
+        Save an image with the specified defect (containing multiple rectangles)
+        
+        Pass the same compositor for all defects of an image so the image is only converted once.
+        """
+        if not original_image or not defect:
+            print(f"Missing original image or defect data")
+            return False
+        
+        # Check if the defect has any rectangles
+        if defect.get_rectangle_count() == 0:
+            print(f"No rectangles found in defect: {defect.name}")
             return False
         
-        # Add extension from original file
-        _, ext = os.path.splitext(original_filename)
-        new_filepath = os.path.join(category_folder, new_filename + ext)
+        # Log defect details for debugging
+        print(f"Saving defect: {defect.name}, Category: {defect.category}, Rectangle count: {defect.get_rectangle_count()}")
+        
+        # Sanitize the rectangles of this defect
+        boxes = get_defect_boxes(defect, original_image.size)
+        
+        # If there is nothing to draw, return false
+        if not boxes:
+            return False
+        
+        output_path_info = self.get_defect_output_path(defect, original_filename)
+        if not output_path_info:
+            return False
+        new_filepath = output_path_info[3]
         
-        # Save the image
+        # Draw the rectangles and save the image
         try:
-            output_image.save(new_filepath)
+            if compositor is None:
+                compositor = OverlayCompositor(original_image)
+            rectangles_drawn, seconds, nbytes = compositor.save_defect(defect, new_filepath, self.encoder, boxes)
+            self.encoder_stats.record(self.encoder.profile, seconds, nbytes)
+            self.log_saved_defect(defect, original_filename, output_path_info, rectangles_drawn, result_text)
+            return True
             
-            # Record in CSV log
-            with open(csv_path, 'a', newline='') as csvfile:
-                csv_writer = csv.writer(csvfile)
-                
-                # Write header if file is new
-                if not csv_exists:
-                    csv_writer.writerow([
-                        "Date", "Time", "Original Filename", "New Filename", "Category", 
-                        "Defect Name", "Rectangle Count in Defect"
-                    ])
-                
-                # Write data for the defect
-                now = datetime.now()
-                # Get base filename without extension for both original and new filenames
-                original_base_filename, _ = os.path.splitext(original_filename)
-                csv_writer.writerow([
-                    now.strftime("%Y-%m-%d"),
-                    now.strftime("%H:%M:%S"),
-                    original_base_filename,
-                    new_filename,  # Already without extension
-                    category,
-                    defect["name"],
-                    rectangles_drawn  # Number of rectangles actually drawn
-                ])
+        except Exception as e:
+            print(f"Failed to save {os.path.basename(new_filepath)}: {str(e)}")
+            return False
+    
+    def save_defects(self, image_path, original_filename, defects, get_original_image):
+        """
+        Save the defects of an image in the configured output mode, skipping defects whose output
+        in the destination folder is already up to date
+        
+        Args:
+            image_path (str): Full path of the source image
+            original_filename (str): Source image filename
+            defects (list): Defects to save (each with its own result text)
+            get_original_image (callable): Returns the full-resolution image (only called when rendering)
             
-            # Update Excel file with results using the Excel Manager
-            self.excel_manager.save_defect_result(category_folder, new_filename + ext, result_text)
+        Returns:
+            tuple: (defects saved including reused ones, defects with rectangles, defects reused)
+        """
+        # Only save defects that have at least one rectangle
+        to_save = []
+        for defect in defects:
+            if defect.get_rectangle_count() > 0:
+                to_save.append(defect)
+            else:
+                print(f"Skipping defect {defect.name} because it has no rectangles")
+        if not to_save:
+            return 0, 0, 0
+        
+        annotations = self.get_setting("output_mode") == "annotations"
+        source_identity = get_source_identity(image_path)
+        
+        # Identical work already written to the destination is reused (no file, no log rows)
+        pending = []
+        reused = 0
+        for defect in to_save:
+            output_path_info = self.get_defect_output_path(
+                defect, original_filename, ANNOTATION_EXTENSION if annotations else None
+            )
+            key = None
+            if source_identity and output_path_info:
+                key = self.get_render_key(source_identity, defect, annotations)
+                if self.render_index.is_current(self.destination_folder, output_path_info[3], key):
+                    print(f"Reusing up-to-date output for defect {defect.name}")
+                    reused += 1
+                    continue
+            pending.append((defect, output_path_info, key))
+        
+        results = []
+        if pending:
+            pending_defects = [defect for defect, _, _ in pending]
+            if annotations:
+                results = self.save_annotations(image_path, original_filename, pending_defects)
+            else:
+                results = self.save_image_with_defects(get_original_image(), pending_defects, original_filename)
+        
+        # Remember what was written so saving it again is skipped
+        for (defect, output_path_info, key), success in zip(pending, results):
+            if success and key:
+                self.render_index.record(self.destination_folder, output_path_info[3], key)
+        
+        return reused + sum(1 for success in results if success), len(to_save), reused
+    
+    def get_render_key(self, source_identity, defect, annotations):
+        """Get the key of everything that determines a defect's output file"""
+        if annotations:
+            output = ["annotations"]
+        else:
+            output = ["images", self.encoder.profile, self.encoder.quality]
+        return make_render_key(
+            output, source_identity, defect.name, defect.category, defect.rename,
+            defect.get_rectangle_lists(), defect.result_text
+        )
+    
+    def classify_image(self, image_path, original_filename, category, rename, result_text=""):
+        """
+        File an image under a category without drawing anything (the original bytes are linked or copied)
+        
+        Args:
+            image_path (str): Full path of the source image
+            original_filename (str): Source image filename
+            category (str): Category to file the image under
+            rename (str): New filename without extension
+            result_text (str): Result text for the Excel file
             
-            return True
+        Returns:
+            tuple: (images saved, images to save, images reused), i.e. (1, 1, 0) on success
+        """
+        defect = Defect(category, rename, category)
+        output_path_info = self.get_defect_output_path(defect, original_filename, os.path.splitext(original_filename)[1])
+        if not output_path_info:
+            return 0, 1, 0
+        
+        # Filing the same unchanged image again is skipped
+        source_identity = get_source_identity(image_path)
+        key = make_render_key(["classify"], source_identity, category, rename, result_text) if source_identity else None
+        if key and self.render_index.is_current(self.destination_folder, output_path_info[3], key):
+            print(f"{original_filename} is already filed as {category}")
+            return 1, 1, 1
+        
+        try:
+            method = link_or_copy(image_path, output_path_info[3])
+            print(f"Classified {original_filename} as {category} ({method})")
+            self.log_saved_defect(defect, original_filename, output_path_info, 0, result_text)
+            if key:
+                self.render_index.record(self.destination_folder, output_path_info[3], key)
+            return 1, 1, 0
+        except Exception as e:
+            print(f"Failed to classify {original_filename}: {str(e)}")
+            return 0, 1, 0
+    
+    def save_annotations(self, image_path, original_filename, defects):
+        """
+        Save defects as annotation sidecars referring to a single stored copy of the original
+        
+        Returns:
+            list: Whether each defect was saved, in order
+        """
+        try:
+            # Only the header is read; pixels are decoded when an image is rendered
+            with Image.open(image_path) as image:
+                image_size = image.size
+            original_path = self.annotation_writer.store_original(self.destination_folder, image_path)
+        except Exception as e:
+            print(f"Failed to store original {original_filename}: {str(e)}")
+            return [False] * len(defects)
+        
+        results = []
+        for defect in defects:
+            boxes = get_defect_boxes(defect, image_size)
+            output_path_info = self.get_defect_output_path(defect, original_filename, ANNOTATION_EXTENSION)
+            if not boxes or not output_path_info:
+                results.append(False)
+                continue
+            try:
+                self.annotation_writer.write_annotation(
+                    output_path_info[3], original_path, original_filename, image_size, defect, len(boxes)
+                )
+                self.log_saved_defect(defect, original_filename, output_path_info, len(boxes), defect.result_text)
+                results.append(True)
+            except Exception as e:
+                print(f"Failed to save annotation {defect.rename}: {str(e)}")
+                results.append(False)
+        return results
+    
+    def save_image_with_defects(self, original_image, defects, original_filename):
+        """
+        Save one image per defect, encoding them in parallel worker processes when possible
+        
+        Args:
+            original_image (Image): Full-resolution source image
+            defects (list): Defects to save (each with its own result text and at least one rectangle)
+            original_filename (str): Source image filename
             
+        Returns:
+            list: Whether each defect was saved, in order
+        """
+        if not original_image:
+            return [False] * len(defects)
+        
+        jobs = [(defect, self.get_defect_output_path(defect, original_filename)) for defect in defects]
+        
+        # Parallel encoding needs several distinct output files; otherwise save one after another
+        output_paths = [info[3] for _, info in jobs if info]
+        use_pool = (
+            self.get_setting("parallel_render")
+            and self.render_pool.is_available()
+            and len(output_paths) > 1
+            and len(set(output_paths)) == len(jobs)
+        )
+        if not use_pool:
+            return self._save_sequentially(original_image, defects, original_filename)
+        
+        for defect in defects:
+            print(f"Saving defect: {defect.name}, Category: {defect.category}, Rectangle count: {defect.get_rectangle_count()}")
+        try:
+            encoder = self.encoder
+            results = self.render_pool.render(original_image, [(defect, info[3]) for defect, info in jobs], encoder)
         except Exception as e:
-            print(f"Failed to save {new_filename + ext}: {str(e)}")
-            return False 
\ No newline at end of file
+            # The worker pool is unusable (e.g. a worker crashed): save this image sequentially and start a fresh pool next time
+            print(f"Parallel rendering failed, saving sequentially: {str(e)}")
+            self.render_pool.reset()
+            return self._save_sequentially(original_image, defects, original_filename)
+        
+        # Log in defect order, only for the images that were written
+        saved = []
+        for (defect, output_path_info), (rectangles_drawn, seconds, nbytes) in zip(jobs, results):
+            if not rectangles_drawn:
+                saved.append(False)
+                continue
+            self.encoder_stats.record(encoder.profile, seconds, nbytes)
+            try:
+                self.log_saved_defect(
+                    defect, original_filename, output_path_info, rectangles_drawn, defect.result_text
+                )
+                saved.append(True)
+            except Exception as e:
+                print(f"Failed to log {defect.rename}: {str(e)}")
+                saved.append(False)
+        return saved
+    
+    def _save_sequentially(self, original_image, defects, original_filename):
+        """Save the defects one after another in the calling thread"""
+        compositor = OverlayCompositor(original_image)
+        return [
+            self.save_image_with_defect(original_image, defect, original_filename, defect.result_text, compositor)
+            for defect in defects
+        ]
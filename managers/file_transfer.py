@@ -0,0 +1,121 @@
+import os
+import hashlib
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no ioctl, so no reflinks
+    fcntl = None
+
+# ioctl request that clones a file's extents (Btrfs, XFS, bcachefs, ...): _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+def link_or_copy(source_path, target_path, hard_link=True):
+    """
+    Place a file at a new path, sharing its storage with the source when the file system allows
+
+    Tries, in order: a hard link (if allowed), a reflink (copy-on-write clone), an in-kernel copy with
+    copy_file_range or sendfile, and finally a regular buffered copy.
+
+    Args:
+        source_path (str): Existing file
+        target_path (str): Path to create (an existing file is replaced, never written into)
+        hard_link (bool): Allow a hard link (False when the file must not change if the source is rewritten in place)
+
+    Returns:
+        str: "hardlink", "reflink", "copy_file_range", "sendfile" or "copy", depending on how the file was placed
+    """
+    # Already linked to this source (e.g. the same image filed again)
+    if hard_link and os.path.exists(target_path) and os.path.samefile(source_path, target_path):
+        return "hardlink"
+
+    # The file is placed under a temporary name and moved over the target, so an existing target
+    # that is a hard link to another source is replaced instead of overwritten in place
+    temp_path = target_path + ".tmp"
+    if os.path.lexists(temp_path):
+        os.remove(temp_path)
+
+    # A hard link costs no data I/O, but only works on the same file system
+    try:
+        if not hard_link:
+            raise OSError("Hard link not allowed")
+        os.link(source_path, temp_path)
+    except (OSError, AttributeError):
+        pass
+    else:
+        try:
+            os.replace(temp_path, target_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return "hardlink"
+
+    # Copy through the temporary file so the target never exists half-written
+    try:
+        with open(source_path, 'rb') as source, open(temp_path, 'wb') as target:
+            method = copy_file_data(source, target)
+        shutil.copystat(source_path, temp_path)
+        os.replace(temp_path, target_path)
+        return method
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def copy_file_data(source, target):
+    """
+    Copy the contents of an open file into an empty open file, avoiding user-space copies when possible
+
+    Returns:
+        str: "reflink", "copy_file_range", "sendfile" or "copy"
+    """
+    source_fd = source.fileno()
+    target_fd = target.fileno()
+    size = os.fstat(source_fd).st_size
+
+    # Reflink: the new file shares the source's blocks until either is modified
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(target_fd, FICLONE, source_fd)
+            return "reflink"
+        except OSError:
+            pass
+
+    # In-kernel copies (server-side copy on NFS 4.2 and SMB3 with copy_file_range)
+    for method in ("copy_file_range", "sendfile"):
+        if not hasattr(os, method):
+            continue
+        try:
+            _copy_in_kernel(getattr(os, method), source_fd, target_fd, size)
+            return method
+        except OSError:
+            # Not supported for these files: start over with the next method
+            os.ftruncate(target_fd, 0)
+            os.lseek(target_fd, 0, os.SEEK_SET)
+
+    os.lseek(source_fd, 0, os.SEEK_SET)
+    shutil.copyfileobj(source, target, 1024 * 1024)
+    return "copy"
+
+def _copy_in_kernel(copy_function, source_fd, target_fd, size):
+    """Copy a whole file with os.copy_file_range or os.sendfile"""
+    offset = 0
+    while offset < size:
+        if copy_function is getattr(os, "sendfile", None):
+            copied = copy_function(target_fd, source_fd, offset, size - offset)
+        else:
+            copied = copy_function(source_fd, target_fd, size - offset, offset, offset)
+        if copied == 0:
+            break
+        offset += copied
+    if offset < size:
+        raise OSError(f"Copied {offset} of {size} bytes")
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Get the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,165 @@
+import tkinter as tk
+from tkinter import ttk
+
+class Filmstrip:
+    """
+    Horizontal strip of thumbnails for navigating the source folder. Canvas items are only
+    created for the visible cells, so it stays smooth with tens of thousands of files.
+    """
+    def __init__(self, parent, on_select, get_thumbnail, thumb_size=96):
+        # on_select(index) is called when a thumbnail is clicked
+        self.on_select = on_select
+
+        # get_thumbnail(index) returns a PhotoImage, or None while it is being generated
+        self.get_thumbnail = get_thumbnail
+
+        # Cell geometry
+        self.thumb_size = thumb_size
+        self.cell_width = thumb_size + 8
+        self.height = thumb_size + 8
+
+        # Number of images and the highlighted one
+        self.count = 0
+        self.current_index = -1
+
+        # Visible cells: index -> (frame item id, content item id, PhotoImage or None)
+        self.cells = {}
+        self._render_job = None
+
+        # Widgets
+        self.frame = ttk.Frame(parent)
+        self.canvas = tk.Canvas(
+            self.frame, height=self.height, bg="gray25", highlightthickness=0,
+            xscrollincrement=self.cell_width
+        )
+        scrollbar = ttk.Scrollbar(self.frame, orient=tk.HORIZONTAL, command=self._on_xview)
+        self.canvas.configure(xscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.pack(side=tk.TOP, fill=tk.X)
+
+        # Events
+        self.canvas.bind("<Configure>", lambda e: self.schedule_render())
+        self.canvas.bind("<ButtonPress-1>", self._on_click)
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self._scroll(-1))
+        self.canvas.bind("<Button-5>", lambda e: self._scroll(1))
+
+    def pack(self, **kwargs):
+        """Pack the filmstrip frame"""
+        self.frame.pack(**kwargs)
+
+    def set_count(self, count):
+        """Set the number of images in the strip"""
+        self.count = count
+        self.canvas.configure(scrollregion=(0, 0, count * self.cell_width, self.height))
+
+        # Cells past the new end (after deletions) must go
+        for index in [index for index in self.cells if index >= count]:
+            self._delete_cell(index)
+        self.schedule_render()
+
+    def set_current(self, index):
+        """Highlight the current image and scroll it into view"""
+        previous = self.current_index
+        self.current_index = index
+        for cell_index in (previous, index):
+            if cell_index in self.cells:
+                self.canvas.itemconfig(self.cells[cell_index][0], outline=self._get_outline(cell_index))
+        self.see(index)
+
+    def see(self, index):
+        """Scroll so that a cell is visible"""
+        if not 0 <= index < self.count:
+            return
+        left = self.canvas.canvasx(0)
+        width = self.canvas.winfo_width()
+        x = index * self.cell_width
+        if x < left or x + self.cell_width > left + width:
+            # Center the cell in the strip
+            total_width = self.count * self.cell_width
+            self.canvas.xview_moveto(max(0, x - (width - self.cell_width) / 2) / total_width)
+        self.schedule_render()
+
+    def refresh(self):
+        """Recreate all visible cells (e.g. after the file list changed)"""
+        for index in list(self.cells):
+            self._delete_cell(index)
+        self.schedule_render()
+
+    def refresh_cell(self, index):
+        """Recreate one visible cell (e.g. when its thumbnail has been generated)"""
+        if index in self.cells:
+            self._delete_cell(index)
+            self._create_cell(index)
+
+    def schedule_render(self):
+        """Render the visible cells once the UI is idle (coalesces bursts of updates)"""
+        if self._render_job is None:
+            self._render_job = self.canvas.after_idle(self.render)
+
+    def render(self):
+        """Create canvas items for the visible cells and delete the others"""
+        self._render_job = None
+        if self.count == 0:
+            for index in list(self.cells):
+                self._delete_cell(index)
+            return
+
+        left = self.canvas.canvasx(0)
+        width = max(self.canvas.winfo_width(), self.cell_width)
+        first = max(0, int(left // self.cell_width))
+        last = min(self.count - 1, int((left + width) // self.cell_width))
+
+        for index in [index for index in self.cells if index < first or index > last]:
+            self._delete_cell(index)
+        for index in range(first, last + 1):
+            if index not in self.cells:
+                self._create_cell(index)
+
+    def _create_cell(self, index):
+        """Create the canvas items of one cell"""
+        x = index * self.cell_width
+        frame_item = self.canvas.create_rectangle(
+            x + 2, 2, x + self.cell_width - 2, self.height - 2,
+            fill="gray35", outline=self._get_outline(index), width=2
+        )
+
+        center_x = x + self.cell_width / 2
+        center_y = self.height / 2
+        photo = self.get_thumbnail(index)
+        if photo:
+            content_item = self.canvas.create_image(center_x, center_y, image=photo)
+        else:
+            # Placeholder until the thumbnail has been generated
+            content_item = self.canvas.create_text(center_x, center_y, text=str(index + 1), fill="white")
+        self.cells[index] = (frame_item, content_item, photo)
+
+    def _delete_cell(self, index):
+        """Delete the canvas items of one cell"""
+        frame_item, content_item, _ = self.cells.pop(index)
+        self.canvas.delete(frame_item, content_item)
+
+    def _get_outline(self, index):
+        """Get the outline color of a cell"""
+        return "yellow" if index == self.current_index else ""
+
+    def _on_xview(self, *args):
+        """Scroll the strip from the scrollbar"""
+        self.canvas.xview(*args)
+        self.schedule_render()
+
+    def _scroll(self, units):
+        """Scroll the strip by a number of cells"""
+        self.canvas.xview_scroll(units, "units")
+        self.schedule_render()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        """Scroll the strip with the mouse wheel"""
+        return self._scroll(-1 if event.delta > 0 else 1)
+
+    def _on_click(self, event):
+        """Select the image under the mouse"""
+        index = int(self.canvas.canvasx(event.x) // self.cell_width)
+        if 0 <= index < self.count:
+            self.on_select(index)
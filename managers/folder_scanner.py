@@ -0,0 +1,63 @@
+import os
+import threading
+
+class FolderScanner:
+    """
+    Scans a folder for image files on a background thread and reports them in batches,
+    so the first images can be shown before a large folder has been fully listed.
+    """
+    def __init__(self, extensions, batch_size=1000, first_batch_size=32):
+        # Lower-case file extensions to include
+        self.extensions = extensions
+
+        # The first batch is small so the first image shows up quickly
+        self.batch_size = batch_size
+        self.first_batch_size = first_batch_size
+
+        # Running scan
+        self.thread = None
+        self.stop_event = None
+
+    def start(self, folder, on_batch):
+        """
+        Start scanning a folder, stopping any scan already in progress
+
+        Args:
+            folder (str): Folder to scan
+            on_batch (callable): Called from the scan thread as on_batch(filenames, done)
+        """
+        self.stop()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self._scan, args=(folder, on_batch, self.stop_event),
+            name="folder-scan", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Stop the running scan (no more batches are reported)"""
+        if self.stop_event:
+            self.stop_event.set()
+        self.thread = None
+        self.stop_event = None
+
+    def _scan(self, folder, on_batch, stop_event):
+        """List the folder with os.scandir and report matching files in batches"""
+        batch = []
+        batch_size = self.first_batch_size
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if stop_event.is_set():
+                        return
+                    if entry.name.lower().endswith(self.extensions):
+                        batch.append(entry.name)
+                    if len(batch) >= batch_size:
+                        on_batch(batch, False)
+                        batch = []
+                        batch_size = self.batch_size
+        except OSError as e:
+            print(f"Error scanning folder: {e}")
+
+        if not stop_event.is_set():
+            on_batch(batch, True)
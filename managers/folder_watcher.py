@@ -0,0 +1,226 @@
+import os
+import sys
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+
+# inotify flags (see inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Files are reported as added once they are fully written or moved in
+ADDED_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+REMOVED_MASK = IN_DELETE | IN_MOVED_FROM
+WATCH_MASK = ADDED_MASK | REMOVED_MASK | IN_DELETE_SELF | IN_MOVE_SELF
+
+# struct inotify_event header: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct("iIII")
+
+def load_inotify():
+    """Get the C library if it provides inotify (Linux only), otherwise None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+class FolderWatcher:
+    """
+    Watches a folder on a background thread and reports image files that are added or removed.
+    Uses inotify where available and falls back to cheap polling of the folder's modification time.
+    """
+    def __init__(self, extensions, poll_interval=1.0, settle_delay=0.2, full_scan_polls=30):
+        # Lower-case file extensions to include
+        self.extensions = extensions
+
+        # Polling fallback: seconds between checks, and a full listing every few polls in case
+        # the folder's modification time did not change (coarse timestamps on some file systems)
+        self.poll_interval = poll_interval
+        self.full_scan_polls = full_scan_polls
+
+        # inotify events are reported once the folder has been quiet for this many seconds
+        self.settle_delay = settle_delay
+
+        # Running watch
+        self.thread = None
+        self.stop_event = None
+
+    def start(self, folder, on_change):
+        """
+        Start watching a folder, stopping any watch already running
+
+        Args:
+            folder (str): Folder to watch
+            on_change (callable): Called from the watch thread as on_change(added, removed)
+                with lists of filenames
+        """
+        self.stop()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self._watch, args=(folder, on_change, self.stop_event),
+            name="folder-watch", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Stop watching (no more changes are reported)"""
+        if self.stop_event:
+            self.stop_event.set()
+        self.thread = None
+        self.stop_event = None
+
+    def _is_image(self, name):
+        """Check if a filename has one of the watched extensions"""
+        return name.lower().endswith(self.extensions)
+
+    def _list_images(self, folder):
+        """List the image files currently in the folder"""
+        with os.scandir(folder) as entries:
+            return {entry.name for entry in entries if self._is_image(entry.name)}
+
+    def _watch(self, folder, on_change, stop_event):
+        """Watch with inotify if possible, otherwise poll"""
+        libc = load_inotify()
+        if libc and self._watch_inotify(libc, folder, on_change, stop_event):
+            return
+        self._watch_polling(folder, on_change, stop_event)
+
+    def _watch_inotify(self, libc, folder, on_change, stop_event):
+        """
+        Watch the folder with inotify
+
+        Returns:
+            bool: False if inotify could not be used and the caller should poll instead
+        """
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return False
+        try:
+            if libc.inotify_add_watch(fd, os.fsencode(folder), WATCH_MASK) < 0:
+                return False
+
+            # Snapshot after the watch is in place so no change is missed in between
+            try:
+                known = self._list_images(folder)
+            except OSError as e:
+                print(f"Error watching folder: {e}")
+                return True
+
+            added, removed = set(), set()
+            while not stop_event.is_set():
+                # Wait briefly while changes are pending so bursts are reported together
+                timeout = self.settle_delay if added or removed else 0.5
+                readable, _, _ = select.select([fd], [], [], timeout)
+                if not readable:
+                    if (added or removed) and not stop_event.is_set():
+                        on_change(sorted(added), sorted(removed))
+                        added, removed = set(), set()
+                    continue
+
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+
+                for mask, name in self._parse_events(data):
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        # The folder itself is gone; nothing more to watch
+                        return True
+                    if mask & IN_Q_OVERFLOW:
+                        # Events were dropped: fall back to comparing a fresh listing
+                        try:
+                            listing = self._list_images(folder)
+                        except OSError:
+                            continue
+                        added |= listing - known
+                        removed |= known - listing
+                        known = listing
+                    elif not self._is_image(name):
+                        continue
+                    elif mask & ADDED_MASK and name not in known:
+                        known.add(name)
+                        if name in removed:
+                            removed.discard(name)
+                        else:
+                            added.add(name)
+                    elif mask & REMOVED_MASK and name in known:
+                        known.discard(name)
+                        if name in added:
+                            added.discard(name)
+                        else:
+                            removed.add(name)
+            return True
+        finally:
+            os.close(fd)
+
+    def _parse_events(self, data):
+        """Split a buffer read from inotify into (mask, filename) pairs"""
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            yield mask, os.fsdecode(name)
+
+    def _watch_polling(self, folder, on_change, stop_event):
+        """Watch the folder by checking its modification time and listing it only when it changed"""
+        try:
+            last_mtime = os.stat(folder).st_mtime_ns
+            known = self._list_images(folder)
+        except OSError as e:
+            print(f"Error watching folder: {e}")
+            return
+
+        # New files are reported once their size stopped changing between two polls
+        settling = {}  # filename -> size at the previous poll
+        polls = 0
+        while not stop_event.wait(self.poll_interval):
+            polls += 1
+            try:
+                mtime = os.stat(folder).st_mtime_ns
+                removed = set()
+                if mtime != last_mtime or polls % self.full_scan_polls == 0:
+                    last_mtime = mtime
+                    listing = self._list_images(folder)
+                    removed = known - listing
+                    known -= removed
+                    for name in list(settling):
+                        if name not in listing:
+                            del settling[name]
+                    for name in listing - known - settling.keys():
+                        settling[name] = -1
+            except OSError as e:
+                print(f"Error watching folder: {e}")
+                continue
+
+            # Check the sizes of the files that are still being written
+            added = []
+            for name, previous_size in list(settling.items()):
+                try:
+                    size = os.stat(os.path.join(folder, name)).st_size
+                except OSError:
+                    del settling[name]
+                    continue
+                if size == previous_size:
+                    del settling[name]
+                    known.add(name)
+                    added.append(name)
+                else:
+                    settling[name] = size
+
+            if (added or removed) and not stop_event.is_set():
+                on_change(sorted(added), sorted(removed))
@@ -1,62 +1,228 @@
-import copy
+import sys
+from abc import ABC, abstractmethod
+from collections import deque
 
-class HistoryManager:
+class DefectCommand(ABC):
     """
-    Manager for undo/redo history.
+    A reversible change to the defects of the current image.
+
+    Commands keep references to the defects they add or remove (and the coordinates of rectangles)
+    instead of copies, so recording a change costs the same however many defects the image has.
     """
-    def __init__(self, max_history=20):
-        # History stack
-        self.history = []
-        self.history_index = -1
-        self.max_history = max_history
-    
-    def add_state(self, state):
-        """Add a new state to history"""
-        # Make a deep copy to ensure state is preserved
-        state_copy = copy.deepcopy(state)
-        
-        # If we're not at the end of the history, truncate it
-        if self.history_index < len(self.history) - 1:
-            self.history = self.history[:self.history_index + 1]
-        
-        # Add the new state
-        self.history.append(state_copy)
-        self.history_index = len(self.history) - 1
-        
-        # Limit history size
-        if len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history:]
-            self.history_index = len(self.history) - 1
-    
-    def undo(self):
-        """Move back one step in history"""
-        if self.history_index >= 0:
-            self.history_index -= 1
-            return True
+    def __init__(self, defect_index):
+        # Defect to select after the command is undone or redone
+        self.defect_index = defect_index
+
+        # Memory counted for the command by the history
+        self.size = 0
+
+    @abstractmethod
+    def undo(self, defect_manager):
+        """Revert the change"""
+
+    @abstractmethod
+    def redo(self, defect_manager):
+        """Apply the change again"""
+
+    def is_noop(self):
+        """Check if the command leaves the defects unchanged"""
+        return False
+
+    def merge(self, command):
+        """Fold a following command into this one (for typing); returns True if it was merged"""
         return False
-    
-    def redo(self):
-        """Move forward one step in history"""
-        if self.history_index < len(self.history) - 1:
-            self.history_index += 1
+
+    def get_size(self):
+        """Estimate the memory held by the command in bytes"""
+        return sys.getsizeof(self) + sys.getsizeof(self.__dict__)
+
+class AddDefectCommand(DefectCommand):
+    """A defect was added at an index"""
+    def __init__(self, defect_index, defect):
+        super().__init__(defect_index)
+        self.defect = defect
+
+    def undo(self, defect_manager):
+        defect_manager.remove_defect(self.defect_index)
+
+    def redo(self, defect_manager):
+        defect_manager.insert_defect(self.defect_index, self.defect)
+
+    def get_size(self):
+        return super().get_size() + self.defect.get_size()
+
+class RemoveDefectCommand(AddDefectCommand):
+    """A defect was removed from an index"""
+    def undo(self, defect_manager):
+        AddDefectCommand.redo(self, defect_manager)
+
+    def redo(self, defect_manager):
+        AddDefectCommand.undo(self, defect_manager)
+
+class AddRectangleCommand(DefectCommand):
+    """A rectangle was added to a defect at an index"""
+    def __init__(self, defect_index, rectangle_index, coords):
+        super().__init__(defect_index)
+        self.rectangle_index = rectangle_index
+        self.coords = coords
+
+    def undo(self, defect_manager):
+        defect_manager.remove_rectangle(self.defect_index, self.rectangle_index)
+
+    def redo(self, defect_manager):
+        defect_manager.insert_rectangle(self.defect_index, self.rectangle_index, self.coords)
+
+    def get_size(self):
+        return super().get_size() + sys.getsizeof(self.coords)
+
+class RemoveRectangleCommand(AddRectangleCommand):
+    """A rectangle was removed from a defect"""
+    def undo(self, defect_manager):
+        AddRectangleCommand.redo(self, defect_manager)
+
+    def redo(self, defect_manager):
+        AddRectangleCommand.undo(self, defect_manager)
+
+class SetDefectPropertyCommand(DefectCommand):
+    """A property of a defect (rename, category) was changed"""
+    def __init__(self, defect_index, property_name, old_value, new_value):
+        super().__init__(defect_index)
+        self.property_name = property_name
+        self.old_value = old_value
+        self.new_value = new_value
+
+    def undo(self, defect_manager):
+        defect_manager.set_defect_property(self.defect_index, self.property_name, self.old_value)
+
+    def redo(self, defect_manager):
+        defect_manager.set_defect_property(self.defect_index, self.property_name, self.new_value)
+
+    def is_noop(self):
+        return self.old_value == self.new_value
+
+    def merge(self, command):
+        # Each keystroke in the rename field is one change; undo reverts the whole edit.
+        # Other properties (e.g. a category picked from the list) undo one change at a time.
+        if (isinstance(command, SetDefectPropertyCommand) and self.property_name == "rename"
+                and command.defect_index == self.defect_index and command.property_name == self.property_name):
+            self.new_value = command.new_value
             return True
         return False
-    
+
+    def get_size(self):
+        return super().get_size() + sys.getsizeof(self.old_value) + sys.getsizeof(self.new_value)
+
+class HistoryManager:
+    """
+    Manager for undo/redo history.
+
+    The history is a list of reversible commands rather than snapshots of all defects, so undo and
+    redo only touch what changed. The oldest commands are dropped once the history uses more
+    memory than its budget.
+    """
+    def __init__(self, max_bytes=1024 * 1024):
+        # Commands that can be undone (oldest first) and commands that can be redone (next last)
+        self.undo_stack = deque()
+        self.redo_stack = []
+
+        # Memory budget and the estimated memory of the commands held
+        self.max_bytes = max_bytes
+        self.size = 0
+
+        # Whether the next command may be folded into the last one
+        self.can_merge = False
+
+    def set_max_bytes(self, max_bytes):
+        """Change the memory budget of the history"""
+        self.max_bytes = max_bytes
+        self._trim()
+
+    def add_command(self, command):
+        """Record a change that has just been made"""
+        if command.is_noop():
+            return
+
+        # A new change makes the undone commands unreachable
+        self._clear_redo()
+
+        # Consecutive edits of the same field are one undo step
+        if self.can_merge and self.undo_stack:
+            last = self.undo_stack[-1]
+            if last.merge(command):
+                self.size -= last.size
+                if last.is_noop():
+                    # Typing back the original value leaves nothing to undo
+                    self.undo_stack.pop()
+                    self.can_merge = False
+                else:
+                    last.size = last.get_size()
+                    self.size += last.size
+                return
+
+        # The size is measured once; shared defects may grow later but are not held only by the history
+        command.size = command.get_size()
+        self.undo_stack.append(command)
+        self.size += command.size
+        self.can_merge = True
+        self._trim()
+
+    def undo(self, defect_manager):
+        """
+        Revert the last command
+
+        Returns:
+            DefectCommand or None: The command that was undone
+        """
+        if not self.undo_stack:
+            return None
+        command = self.undo_stack.pop()
+        command.undo(defect_manager)
+        self.redo_stack.append(command)
+        self.can_merge = False
+        return command
+
+    def redo(self, defect_manager):
+        """
+        Apply the last undone command again
+
+        Returns:
+            DefectCommand or None: The command that was redone
+        """
+        if not self.redo_stack:
+            return None
+        command = self.redo_stack.pop()
+        command.redo(defect_manager)
+        self.undo_stack.append(command)
+        self.can_merge = False
+        return command
+
     def can_undo(self):
         """Check if undo is possible"""
-        return self.history_index > 0
-    
+        return len(self.undo_stack) > 0
+
     def can_redo(self):
         """Check if redo is possible"""
-        return self.history_index < len(self.history) - 1
-    
-    def get_current_state(self):
-        """Get the current state"""
-        if 0 <= self.history_index < len(self.history):
-            return copy.deepcopy(self.history[self.history_index])
-        return None
-    
+        return len(self.redo_stack) > 0
+
     def clear_history(self):
         """Clear the history"""
-        self.history = []
-        self.history_index = -1 
\ No newline at end of file
+        self.undo_stack.clear()
+        self.redo_stack = []
+        self.size = 0
+        self.can_merge = False
+
+    def compact(self):
+        """Drop what only matters while the image is being edited (the redo branch) before the history is stored"""
+        self._clear_redo()
+        self.can_merge = False
+
+    def _clear_redo(self):
+        """Drop the undone commands"""
+        for command in self.redo_stack:
+            self.size -= command.size
+        self.redo_stack = []
+
+    def _trim(self):
+        """Drop the oldest commands until the history fits its memory budget (the last one is always kept)"""
+        while self.size > self.max_bytes and len(self.undo_stack) > 1:
+            self.size -= self.undo_stack.popleft().size
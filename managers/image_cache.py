@@ -0,0 +1,181 @@
+import os
+import threading
+from collections import OrderedDict
+
+def get_image_nbytes(image):
+    """Estimate the memory used by the decoded pixels of an image"""
+    if image.mode in ("I", "F"):
+        band_bytes = 4
+    elif image.mode.startswith("I;16"):
+        band_bytes = 2
+    else:
+        band_bytes = 1
+    return image.width * image.height * len(image.getbands()) * band_bytes
+
+class ImageCache:
+    """
+    Memory-bounded LRU cache of decoded images keyed by file path and reduce factor,
+    invalidated by file mtime/size.
+    """
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        # Byte budget for all cached images
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+
+        # (path, reduce factor) -> (file signature, image, nbytes), least recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Counters for sizing the cache
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def set_max_bytes(self, max_bytes):
+        """Change the byte budget, evicting entries if needed"""
+        with self.lock:
+            self.max_bytes = max(0, int(max_bytes))
+            self._evict()
+
+    def get_file_signature(self, path):
+        """Get the (mtime, size) signature used to detect changed files"""
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, path, reduce=1):
+        """
+        Get a cached image if the file has not changed since it was cached
+
+        Args:
+            path (str): Full path of the image file
+            reduce (int): Reduce factor the image was decoded at (1 = full resolution)
+
+        Returns:
+            Image or None: The cached image, or None on a miss
+        """
+        try:
+            signature = self.get_file_signature(path)
+        except OSError:
+            signature = None
+
+        key = (path, reduce)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] == signature:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            # Drop stale entries for files that changed on disk
+            if entry:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, path, image, signature=None, reduce=1):
+        """Add a decoded image to the cache"""
+        if signature is None:
+            try:
+                signature = self.get_file_signature(path)
+            except OSError:
+                return False
+
+        nbytes = get_image_nbytes(image)
+        with self.lock:
+            # Images larger than the whole budget are never cached
+            if nbytes > self.max_bytes:
+                return False
+
+            key = (path, reduce)
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (signature, image, nbytes)
+            self.current_bytes += nbytes
+            self._evict()
+        return True
+
+    def invalidate(self, path):
+        """Remove all decoded variants of a path from the cache"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == path]:
+                self._remove(key)
+
+    def clear(self):
+        """Remove all cached images"""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self):
+        """Get the cache counters and memory usage"""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def _remove(self, key):
+        """Remove an entry (caller holds the lock)"""
+        _, _, nbytes = self.entries.pop(key)
+        self.current_bytes -= nbytes
+
+    def _evict(self):
+        """Evict least recently used entries until within budget (caller holds the lock)"""
+        while self.entries and self.current_bytes > self.max_bytes:
+            _, (_, _, nbytes) = self.entries.popitem(last=False)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+
+class FrameCache:
+    """
+    Memory-bounded LRU cache of resized display frames keyed by image, zoom level and
+    canvas size. Only used from the UI thread.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        # Byte budget for all cached frames
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+
+        # key -> (frame, nbytes), least recently used first
+        self.entries = OrderedDict()
+
+    def set_max_bytes(self, max_bytes):
+        """Change the byte budget, evicting frames if needed"""
+        self.max_bytes = max(0, int(max_bytes))
+        self._evict()
+
+    def get(self, key):
+        """Get the frame cached for a key, or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, frame):
+        """Cache a resized frame"""
+        nbytes = get_image_nbytes(frame)
+        if nbytes > self.max_bytes:
+            return False
+
+        if key in self.entries:
+            self.current_bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (frame, nbytes)
+        self.current_bytes += nbytes
+        self._evict()
+        return True
+
+    def clear(self):
+        """Remove all cached frames"""
+        self.entries.clear()
+        self.current_bytes = 0
+
+    def _evict(self):
+        """Evict least recently used frames until within budget"""
+        while self.entries and self.current_bytes > self.max_bytes:
+            _, (_, nbytes) = self.entries.popitem(last=False)
+            self.current_bytes -= nbytes
@@ -0,0 +1,92 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class ImagePrefetcher:
+    """
+    Manager for decoding neighbouring images on a worker thread pool so navigation does not block the UI.
+    """
+    def __init__(self, loader, ahead=2, behind=1, max_workers=2):
+        # Callable that decodes an image path for a given canvas size (runs on a worker thread)
+        self.loader = loader
+
+        # How many images to prefetch after and before the current one
+        self.ahead = ahead
+        self.behind = behind
+
+        # Worker pool and the pending/finished prefetch jobs keyed by image path
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def configure(self, ahead, behind):
+        """Change how many neighbouring images are prefetched"""
+        self.ahead = max(0, int(ahead))
+        self.behind = max(0, int(behind))
+
+    def get_neighbour_paths(self, image_files, source_folder, index):
+        """Get the paths of the images that should be prefetched around an index"""
+        indexes = []
+        for offset in range(1, self.ahead + 1):
+            indexes.append(index + offset)
+        for offset in range(1, self.behind + 1):
+            indexes.append(index - offset)
+
+        return [os.path.join(source_folder, image_files[i])
+                for i in indexes if 0 <= i < len(image_files)]
+
+    def schedule(self, image_files, source_folder, index, canvas_size):
+        """Start decoding the neighbours of the image at index, dropping jobs that are no longer needed"""
+        wanted = self.get_neighbour_paths(image_files, source_folder, index)
+
+        with self.lock:
+            # Cancel jobs for images that are no longer neighbours
+            for path in list(self.jobs):
+                if path not in wanted:
+                    future, _ = self.jobs.pop(path)
+                    future.cancel()
+
+            # Submit jobs for new neighbours (or ones prepared for another canvas size)
+            for path in wanted:
+                job = self.jobs.get(path)
+                if job and job[1] == canvas_size:
+                    continue
+                if job:
+                    job[0].cancel()
+                future = self.executor.submit(self.loader, path, canvas_size)
+                self.jobs[path] = (future, canvas_size)
+
+    def take(self, path):
+        """
+        Take the prefetched result for a path
+
+        Args:
+            path (str): Full path of the image
+
+        Returns:
+            The loader result, or None if the image was not prefetched or failed to decode
+        """
+        with self.lock:
+            job = self.jobs.pop(path, None)
+
+        if job is None or job[0].cancelled():
+            return None
+
+        try:
+            # Waits only if the worker is still decoding this image
+            return job[0].result()
+        except Exception as e:
+            print(f"Error prefetching image: {e}")
+            return None
+
+    def clear(self):
+        """Cancel and forget all prefetch jobs"""
+        with self.lock:
+            for future, _ in self.jobs.values():
+                future.cancel()
+            self.jobs = {}
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self.clear()
+        self.executor.shutdown(wait=False)
@@ -1,5 +1,13 @@
 import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageTk
+from managers.image_prefetcher import ImagePrefetcher
+from managers.image_cache import ImageCache, FrameCache
+from managers.tile_renderer import TileRenderer
+from managers.display_surface import DisplaySurface
+from managers.thumbnail_cache import ThumbnailCache
+from managers.view_transform import ViewTransform
 
 class ImageProcessor:
     """
@@ -11,32 +19,196 @@ class ImageProcessor:
         self.source_folder = ""
         self.current_index = 0
         self.current_filename = ""
+        self.image_file_set = set()  # Fast membership checks for files reported more than once
+        self.current_removed = False  # The current file was deleted from the source folder
         
         # Image objects
-        self.original_image = None
+        self.image_path = ""
+        self.image_signature = None  # File (mtime, size) of the current image
+        self.image_size = None  # Full-resolution (width, height) of the current image
+        self.original_image = None  # Full-resolution pixels, decoded on demand
+        self.display_source = None  # Reduced-resolution decode used for display
         self.displayed_image = None
         self.photo_image = None
         
+        # Reused PhotoImage buffers the displayed frames are pasted into
+        self.display_surface = DisplaySurface()
+        
+        # Zoomed views larger than the canvas are rendered as tiles of the visible region only
+        self.tile_renderer = TileRenderer()
+        self.tiled = False
+        self.display_size = (0, 0)
+        
         # Zoom level (1.0 = 100%)
         self.zoom_level = 1.0
+        
+        # Coordinate transform of the last view it was requested for
+        self.view_transform = None
+        
+        # Fit-resized frame handed over by the prefetcher: ((canvas_width, canvas_height), image)
+        self.prefetched_frame = None
+        
+        # Decoded images shared by navigation and the prefetcher
+        self.image_cache = ImageCache()
+        
+        # Resized frames per (image, zoom level, canvas size) so zooming back is a lookup
+        self.frame_cache = FrameCache()
+        
+        # Background decoder for neighbouring images
+        self.prefetcher = ImagePrefetcher(self._decode_for_display)
+        
+        # Frames and tiles are first shown with a cheap resample and refined in the background
+        self.refine_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refine")
+        self.refine_jobs = []  # ("frame" or "tile", key, future)
+        self.current_frame_key = None
+        
+        # Thumbnails for the filmstrip: persistent files plus recently shown PhotoImages
+        self.thumbnail_cache = ThumbnailCache()
+        self.thumbnail_photos = OrderedDict()
+        self.max_thumbnail_photos = 256
     
     def set_image_files(self, image_files, source_folder):
         """Set the list of available image files"""
         self.image_files = image_files
+        self.image_file_set = set(image_files)
         self.source_folder = source_folder
+        self.prefetcher.clear()
+        
+        if source_folder != self.thumbnail_cache.source_folder:
+            self.thumbnail_cache.set_source_folder(source_folder)
+            self.thumbnail_photos.clear()
+    
+    def append_image_files(self, image_files):
+        """
+        Add image files to the end of the list without changing the current image
+        
+        Returns:
+            list: The files that were not in the list yet
+        """
+        added = [filename for filename in image_files if filename not in self.image_file_set]
+        self.image_files.extend(added)
+        self.image_file_set.update(added)
+        return added
+    
+    def remove_image_files(self, image_files):
+        """
+        Remove image files from the list, keeping the current image and its position
+        
+        Args:
+            image_files (list): Filenames deleted from the source folder
+            
+        Returns:
+            list: The files that were in the list and have been removed
+        """
+        removed = {filename for filename in image_files if filename in self.image_file_set}
+        if not removed:
+            return []
+        
+        # Files before the current one shift it to the left
+        shift = sum(1 for filename in self.image_files[:self.current_index] if filename in removed)
+        if self.current_filename in removed:
+            # Keep showing the deleted image; the next image now sits at its old position
+            self.current_removed = True
+        self.current_index -= shift
+        
+        self.image_files = [filename for filename in self.image_files if filename not in removed]
+        self.image_file_set -= removed
+        for filename in removed:
+            self.image_cache.invalidate(os.path.join(self.source_folder, filename))
+            self.thumbnail_cache.invalidate(filename)
+            self.thumbnail_photos.pop(filename, None)
+        return sorted(removed)
+    
+    def get_neighbour_index(self, step):
+        """Get the index of the next (step=1) or previous (step=-1) image"""
+        if self.current_removed and step > 0:
+            # The removed image's successor has moved into its index
+            return self.current_index
+        return self.current_index + step
+    
+    def get_thumbnail(self, index, on_ready):
+        """
+        Get the thumbnail of an image for the filmstrip
+        
+        Args:
+            index (int): Index of the image in image_files
+            on_ready (callable): Called from a worker thread with the thumbnail path when a missing thumbnail has been generated
+            
+        Returns:
+            PhotoImage or None: The thumbnail, or None while it is being generated
+        """
+        if not 0 <= index < len(self.image_files):
+            return None
+        
+        filename = self.image_files[index]
+        photo = self.thumbnail_photos.get(filename)
+        if photo:
+            self.thumbnail_photos.move_to_end(filename)
+            return photo
+        
+        thumbnail_path = self.thumbnail_cache.request(filename, on_ready)
+        if not thumbnail_path:
+            return None
+        try:
+            with Image.open(thumbnail_path) as thumbnail:
+                photo = ImageTk.PhotoImage(thumbnail)
+        except Exception as e:
+            print(f"Error loading thumbnail: {e}")
+            return None
+        
+        self.thumbnail_photos[filename] = photo
+        while len(self.thumbnail_photos) > self.max_thumbnail_photos:
+            self.thumbnail_photos.popitem(last=False)
+        return photo
+    
+    def configure_prefetch(self, ahead, behind):
+        """Set how many images after and before the current one are decoded in the background"""
+        self.prefetcher.configure(ahead, behind)
+    
+    def configure_cache(self, max_megabytes):
+        """Set the memory budget of the decoded image cache"""
+        self.image_cache.set_max_bytes(max_megabytes * 1024 * 1024)
+    
+    def configure_frame_cache(self, max_megabytes):
+        """Set the memory budget of the resized frame cache"""
+        self.frame_cache.set_max_bytes(max_megabytes * 1024 * 1024)
+    
+    def get_cache_stats(self):
+        """Get hit/miss/eviction counters of the decoded image cache"""
+        return self.image_cache.get_stats()
     
     def load_image(self, index):
         """Load image at specified index"""
         if not self.image_files or not (0 <= index < len(self.image_files)):
             return False
         
+        # Frames and tiles of the previous image still waiting to be refined are not needed anymore
+        self._cancel_refinements()
+        
         self.current_index = index
         self.current_filename = self.image_files[index]
+        self.current_removed = False
         self.zoom_level = 1.0  # Reset zoom level for new image
+        self.prefetched_frame = None
         
         try:
             image_path = os.path.join(self.source_folder, self.current_filename)
-            self.original_image = Image.open(image_path)
+            
+            # Use the display image decoded in the background if the prefetcher has it
+            prefetched = self.prefetcher.take(image_path)
+            if prefetched:
+                image_size, display_source, self.prefetched_frame = prefetched
+            else:
+                # Only read the header here - pixels are decoded at the resolution the canvas needs
+                with Image.open(image_path) as image:
+                    image_size = image.size
+                display_source = None
+            
+            self.image_path = image_path
+            self.image_signature = self.image_cache.get_file_signature(image_path)
+            self.image_size = image_size
+            self.display_source = display_source
+            self.original_image = None
             
             # Don't resize here - wait for canvas dimensions
             # The UI manager will call resize_image with canvas dimensions
@@ -45,33 +217,254 @@ class ImageProcessor:
             print(f"Error loading image: {e}")
             return False
     
-    def resize_image(self, canvas_width, canvas_height):
-        """Resize image to fit canvas while maintaining aspect ratio"""
-        if not self.original_image:
-            return False
+    def prefetch_neighbours(self, canvas_width, canvas_height):
+        """Start decoding the images around the current one in the background"""
+        if not self.image_files:
+            return
+        self.prefetcher.schedule(
+            self.image_files, self.source_folder, self.current_index, (canvas_width, canvas_height)
+        )
+    
+    def _decode_image(self, image_path, reduce=1):
+        """
+        Open an image and decode its pixels, reusing the cached copy if the file is unchanged
+        
+        Args:
+            image_path (str): Full path of the image
+            reduce (int): Decode at roughly 1/reduce of the full resolution (1 = full resolution)
+            
+        Returns:
+            Image: The decoded image
+        """
+        image = self.image_cache.get(image_path, reduce)
+        if image is not None:
+            return image
+        
+        # Take the file signature before decoding so a concurrent change is not cached as current
+        signature = self.image_cache.get_file_signature(image_path)
+        image = Image.open(image_path)
         
-        # Get image dimensions
-        img_width, img_height = self.original_image.size
+        if reduce > 1 and image.format == "JPEG":
+            # Let the JPEG decoder scale down by DCT (1/2, 1/4 or 1/8) instead of decoding every pixel
+            image.draft(image.mode, (-(-image.width // reduce), -(-image.height // reduce)))
+            image.load()
+        elif reduce > 1:
+            # Other formats have no draft mode, so box-reduce right after decoding
+            image.load()
+            if image.mode in ("1", "P") or image.mode.startswith("I;16"):
+                # Palette, bilevel and 16-bit images must be expanded before they can be reduced
+                image = image.convert("RGBA")
+            image = image.reduce(reduce)
+        else:
+            image.load()
+        
+        # Cached images are shared, so they must never be modified in place
+        self.image_cache.put(image_path, image, signature, reduce)
+        return image
+    
+    def _get_reduce_factor(self, image_size, canvas_width, canvas_height):
+        """Get the largest reduce factor that still covers the fit-to-canvas size"""
+        fit_width, fit_height = self._get_display_size(image_size, canvas_width, canvas_height, 1.0)
+        if fit_width <= 0 or fit_height <= 0:
+            return 1
+        return max(1, min(image_size[0] // fit_width, image_size[1] // fit_height))
+    
+    def _decode_for_display(self, image_path, canvas_size):
+        """Decode an image for display and its fit-to-canvas frame (runs on a prefetch worker thread)"""
+        with Image.open(image_path) as image:
+            image_size = image.size
+        
+        reduce = self._get_reduce_factor(image_size, *canvas_size)
+        display_source = self._decode_image(image_path, reduce)
+        frame_size = self._get_display_size(image_size, *canvas_size, zoom_level=1.0)
+        frame = display_source.resize(frame_size, Image.LANCZOS)
+        return image_size, display_source, (canvas_size, frame)
+    
+    def _get_display_source(self, display_size, canvas_width, canvas_height):
+        """Get the lowest resolution decode of the current image that covers the display size"""
+        source = self.display_source
+        if source and source.width >= display_size[0] and source.height >= display_size[1]:
+            return source
+        
+        # Zoomed past the fit ratio - only the full-resolution pixels are detailed enough
+        if self.zoom_level > 1.0:
+            return self.get_original_image()
+        
+        # The canvas grew since the display image was decoded, so decode it again for this size
+        reduce = self._get_reduce_factor(self.image_size, canvas_width, canvas_height)
+        self.display_source = self._decode_image(self.image_path, reduce)
+        return self.display_source
+    
+    def _get_display_size(self, image_size, canvas_width, canvas_height, zoom_level):
+        """Calculate the displayed size of an image for a canvas size and zoom level"""
+        img_width, img_height = image_size
         
         # Calculate scaling factor to fit in canvas
         fit_ratio = min(canvas_width / img_width, canvas_height / img_height)
         
         # Apply zoom level to the scaling ratio
-        effective_ratio = fit_ratio * self.zoom_level
+        effective_ratio = fit_ratio * zoom_level
         
         # Calculate new dimensions with zoom applied
-        new_width = int(img_width * effective_ratio)
-        new_height = int(img_height * effective_ratio)
+        return (int(img_width * effective_ratio), int(img_height * effective_ratio))
+    
+    def resize_image(self, canvas_width, canvas_height):
+        """Resize image to fit canvas while maintaining aspect ratio"""
+        if not self.image_size:
+            return False
+        
+        new_size = self._get_display_size(
+            self.image_size, canvas_width, canvas_height, self.zoom_level
+        )
+        
+        self.display_size = new_size
+        
+        # Larger than the canvas: only the visible tiles are resampled (see get_visible_tiles)
+        if new_size[0] > canvas_width or new_size[1] > canvas_height:
+            try:
+                source = self._get_display_source(new_size, canvas_width, canvas_height)
+            except Exception as e:
+                print(f"Error decoding image: {e}")
+                return False
+            if source is None:
+                return False
+            self.tile_renderer.set_source(source, new_size, (self.image_path, new_size))
+            self.tiled = True
+            self.displayed_image = None
+            self.photo_image = None
+            return True
+        self.tiled = False
+        
+        # Shown as a single frame: queued tiles and older frames are stale
+        self._cancel_refinements()
+        
+        # Zooming back to a level already shown for this canvas size needs no resampling
+        frame_key = (
+            self.image_path, self.image_signature, round(self.zoom_level, 2), (canvas_width, canvas_height)
+        )
+        self.current_frame_key = frame_key
+        cached = self.frame_cache.get(frame_key)
+        if cached:
+            self.displayed_image = cached
+            self.photo_image = self.display_surface.show(cached)
+            return True
+        
+        # Reuse the (high quality) frame resized by the prefetcher when it matches the requested size
+        frame = self.prefetched_frame
+        if frame and frame[0] == (canvas_width, canvas_height) and frame[1].size == new_size:
+            self.displayed_image = frame[1]
+            self.photo_image = self.display_surface.show(self.displayed_image)
+            self.frame_cache.put(frame_key, self.displayed_image)
+            return True
+        
+        try:
+            source = self._get_display_source(new_size, canvas_width, canvas_height)
+        except Exception as e:
+            print(f"Error decoding image: {e}")
+            return False
+        if source is None:
+            return False
         
-        # Resize and update display image
-        self.displayed_image = self.original_image.copy().resize((new_width, new_height))
-        self.photo_image = ImageTk.PhotoImage(self.displayed_image)
+        # Show a nearest-neighbour preview now and swap in the high quality frame when it is ready
+        self.displayed_image = source.resize(new_size, Image.NEAREST)
+        self.photo_image = self.display_surface.show(self.displayed_image)
+        self._refine_later("frame", frame_key, source, new_size)
         
         return True
     
+    def _refine_later(self, kind, key, source, size, box=None):
+        """Queue a high quality resample of a frame or tile on the refine worker"""
+        future = self.refine_executor.submit(source.resize, size, Image.LANCZOS, box)
+        self.refine_jobs.append((kind, key, future))
+    
+    def _cancel_refinements(self, visible_tiles=None):
+        """
+        Cancel queued refinements that are no longer needed (jobs already running finish normally)
+        
+        Args:
+            visible_tiles (set): Keys of the tiles on screen, whose jobs are kept (default: cancel all queued jobs)
+        """
+        remaining = []
+        for kind, key, future in self.refine_jobs:
+            if (visible_tiles is not None and key in visible_tiles) or not future.cancel():
+                remaining.append((kind, key, future))
+            elif kind == "tile":
+                # Forget the preview so the tile is rendered and refined again if it comes back into view
+                self.tile_renderer.discard(key)
+        self.refine_jobs = remaining
+    
+    def has_pending_refinements(self):
+        """Check if high quality frames or tiles are still being computed"""
+        return bool(self.refine_jobs)
+    
+    def collect_refinements(self):
+        """
+        Swap in the high quality frames and tiles that finished refining (call from the UI thread)
+        
+        Returns:
+            tuple: (True if photo_image was updated, list of (tile key, PhotoImage) for refined tiles)
+        """
+        frame_changed = False
+        refined_tiles = []
+        pending = []
+        
+        for kind, key, future in self.refine_jobs:
+            if future.cancelled():
+                continue
+            if not future.done():
+                pending.append((kind, key, future))
+                continue
+            try:
+                image = future.result()
+            except Exception as e:
+                print(f"Error refining image: {e}")
+                continue
+            
+            if kind == "frame":
+                self.frame_cache.put(key, image)
+                if key == self.current_frame_key and not self.tiled:
+                    self.displayed_image = image
+                    self.photo_image = self.display_surface.show(image)
+                    frame_changed = True
+            else:
+                photo_image = self.tile_renderer.refine_tile(key, image)
+                if photo_image:
+                    refined_tiles.append((key, photo_image))
+        
+        self.refine_jobs = pending
+        return frame_changed, refined_tiles
+    
+    def is_tiled(self):
+        """Check if the current view is rendered as tiles instead of a single image"""
+        return self.tiled
+    
+    def get_visible_tiles(self, viewport):
+        """
+        Get the rendered tiles covering the visible part of a tiled view
+        
+        Args:
+            viewport (tuple): (x1, y1, x2, y2) visible region in canvas coordinates
+            
+        Returns:
+            list: (tile key, x, y, PhotoImage) for every visible tile
+        """
+        if not self.tiled:
+            return []
+        tiles = self.tile_renderer.get_tiles(viewport)
+        
+        # Tiles of other images, zoom levels or scrolled-away regions are not worth refining anymore
+        self._cancel_refinements({tile[0] for tile in tiles})
+        
+        # New tiles were rendered as previews - refine them in the background
+        source = self.tile_renderer.source
+        for key, size, box in self.tile_renderer.take_previews():
+            self._refine_later("tile", key, source, size, box)
+        
+        return tiles
+    
     def zoom_in(self, canvas_width, canvas_height):
         """Increase zoom level"""
-        if not self.original_image:
+        if not self.image_size:
             return False
             
         self.zoom_level = min(2.0, self.zoom_level + 0.1)
@@ -79,7 +472,7 @@ class ImageProcessor:
     
     def zoom_out(self, canvas_width, canvas_height):
         """Decrease zoom level"""
-        if not self.original_image:
+        if not self.image_size:
             return False
             
         # Don't allow zooming out too much - minimum is to fit the whole image
@@ -88,66 +481,49 @@ class ImageProcessor:
     
     def reset_zoom(self, canvas_width, canvas_height):
         """Reset zoom to fit the whole image"""
-        if not self.original_image:
+        if not self.image_size:
             return False
             
         self.zoom_level = 1.0
         return self.resize_image(canvas_width, canvas_height)
     
+    def get_view_transform(self, canvas_dimensions, scroll_offset=(0, 0)):
+        """
+        Get the coordinate transform of the current view (reused while the image, canvas size,
+        zoom level and scroll offset stay the same)
+        
+        Args:
+            canvas_dimensions (tuple): Canvas width and height
+            scroll_offset (tuple): Canvas position of the window's top-left corner
+            
+        Returns:
+            ViewTransform or None: The transform, or None if no image is loaded
+        """
+        if not self.image_size:
+            return None
+        key = (tuple(self.image_size), tuple(canvas_dimensions), self.zoom_level, tuple(scroll_offset))
+        if self.view_transform is None or self.view_transform.key != key:
+            self.view_transform = ViewTransform(self.image_size, canvas_dimensions, self.zoom_level, scroll_offset)
+        return self.view_transform
+    
     def canvas_to_image_coords(self, canvas_coords, canvas_dimensions):
         """Convert canvas coordinates to original image coordinates"""
-        if not self.original_image or not canvas_coords:
+        transform = self.get_view_transform(canvas_dimensions)
+        if not transform or not canvas_coords:
             return None
-        
-        # Unpack coordinates
-        canvas_x1, canvas_y1, canvas_x2, canvas_y2 = canvas_coords
-        canvas_width, canvas_height = canvas_dimensions
-        
-        # Get image dimensions
-        img_width, img_height = self.original_image.size
-        
-        # Calculate scaling factor based on zoom level and fit-to-canvas ratio
-        fit_ratio = min(canvas_width / img_width, canvas_height / img_height)
-        scale_x = 1.0 / (fit_ratio * self.zoom_level)
-        scale_y = 1.0 / (fit_ratio * self.zoom_level)
-        
-        # Convert to original image coordinates
-        orig_x1 = int(canvas_x1 * scale_x)
-        orig_y1 = int(canvas_y1 * scale_y)
-        orig_x2 = int(canvas_x2 * scale_x)
-        orig_y2 = int(canvas_y2 * scale_y)
-        
-        return (orig_x1, orig_y1, orig_x2, orig_y2)
+        return tuple(transform.canvas_to_image(canvas_coords))
     
     def image_to_canvas_coords(self, image_coords, canvas_dimensions):
         """Convert original image coordinates to canvas coordinates"""
-        if not self.original_image or not image_coords:
+        transform = self.get_view_transform(canvas_dimensions)
+        if not transform or not image_coords:
             return None
-        
-        # Unpack coordinates
-        img_x1, img_y1, img_x2, img_y2 = image_coords
-        canvas_width, canvas_height = canvas_dimensions
-        
-        # Get image dimensions
-        img_width, img_height = self.original_image.size
-        
-        # Calculate scaling factor based on zoom level and fit-to-canvas ratio
-        fit_ratio = min(canvas_width / img_width, canvas_height / img_height)
-        scale_x = fit_ratio * self.zoom_level
-        scale_y = fit_ratio * self.zoom_level
-        
-        # Convert to canvas coordinates
-        canvas_x1 = int(img_x1 * scale_x)
-        canvas_y1 = int(img_y1 * scale_y)
-        canvas_x2 = int(img_x2 * scale_x)
-        canvas_y2 = int(img_y2 * scale_y)
-        
-        return (canvas_x1, canvas_y1, canvas_x2, canvas_y2)
+        return tuple(transform.image_to_canvas(image_coords))
     
     def get_image_dimensions(self):
         """Get dimensions of the original image"""
-        if self.original_image:
-            return self.original_image.size
+        if self.image_size:
+            return self.image_size
         return (0, 0)
     
     def get_current_filename_parts(self):
@@ -157,13 +533,29 @@ class ImageProcessor:
         return ("", "")
     
     def get_original_image(self):
-        """Get the original image object"""
+        """Get the full-resolution image, decoding it on first use"""
+        if self.original_image is None and self.image_path:
+            try:
+                self.original_image = self._decode_image(self.image_path)
+            except Exception as e:
+                print(f"Error loading image: {e}")
         return self.original_image
     
+    def load_original_image(self, image_path):
+        """Decode an image at full resolution (safe to call from worker threads)"""
+        return self._decode_image(image_path)
+    
     def get_current_filename(self):
         """Get the current image filename"""
         return self.current_filename
     
     def has_current_image(self):
         """Check if a current image is loaded"""
-        return self.original_image is not None 
\ No newline at end of file
+        return self.image_size is not None
+    
+    def shutdown(self):
+        """Stop background work"""
+        self.prefetcher.shutdown()
+        self.refine_executor.shutdown(wait=False)
+        self.thumbnail_cache.shutdown()
+        print(f"Image cache stats: {self.get_cache_stats()}") 
\ No newline at end of file
@@ -0,0 +1,115 @@
+import os
+import json
+import hashlib
+import threading
+from managers.thumbnail_cache import SIDECAR_FOLDER
+
+def make_render_key(*parts):
+    """Hash everything that determines an output file (JSON-serializable parts) into a key"""
+    data = json.dumps(parts, separators=(",", ":"), sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+def get_source_identity(image_path):
+    """
+    Identify a source file by path, size and modification time (cheap, no content read)
+
+    Returns:
+        list or None: [absolute path, size, mtime in ns], or None if the file cannot be read
+    """
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+    return [os.path.abspath(image_path), stat.st_size, stat.st_mtime_ns]
+
+class RenderIndex:
+    """
+    Index of the outputs already written to a destination folder and the key of the work that
+    produced them, so saving the same defect again can be skipped. Stored as an append-only
+    journal in the destination's .bug_validator folder.
+    """
+    def __init__(self, filename="render_index.jsonl"):
+        # Journal filename inside the sidecar folder
+        self.filename = filename
+
+        # Destination folder the entries belong to, and its open journal
+        self.destination_folder = None
+        self.file = None
+
+        # Output path (relative to the destination) -> (key, size of the written file)
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def is_current(self, destination_folder, output_path, key):
+        """Check if an output file exists and was written by the work identified by key"""
+        with self.lock:
+            try:
+                self._load(destination_folder)
+                entry = self.entries.get(os.path.relpath(output_path, destination_folder))
+                if not entry or entry[0] != key:
+                    return False
+                # The file may have been deleted or replaced since
+                return os.path.getsize(output_path) == entry[1]
+            except OSError:
+                return False
+
+    def record(self, destination_folder, output_path, key):
+        """Remember that an output file was written by the work identified by key"""
+        with self.lock:
+            try:
+                self._load(destination_folder)
+                relative_path = os.path.relpath(output_path, destination_folder)
+                size = os.path.getsize(output_path)
+                self.entries[relative_path] = (key, size)
+                self.file.write(json.dumps({"path": relative_path, "key": key, "size": size}) + "\n")
+                self.file.flush()
+            except OSError as e:
+                print(f"Failed to update render index: {str(e)}")
+
+    def close(self):
+        """Close the journal"""
+        with self.lock:
+            self._close_file()
+            self.destination_folder = None
+            self.entries = {}
+
+    def _load(self, destination_folder):
+        """Read the journal of a destination folder (compacting it if it has many stale lines)"""
+        if destination_folder == self.destination_folder:
+            return
+        self._close_file()
+        self.destination_folder = None
+        self.entries = {}
+
+        index_folder = os.path.join(destination_folder, SIDECAR_FOLDER)
+        os.makedirs(index_folder, exist_ok=True)
+        index_path = os.path.join(index_folder, self.filename)
+
+        lines = 0
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry["path"]] = (entry["key"], entry["size"])
+                        lines += 1
+                    except (ValueError, KeyError):
+                        # A crash while writing can leave a partial last line
+                        continue
+
+        # Later lines replace earlier ones; rewrite the journal once most lines are stale
+        if lines > 2 * len(self.entries) + 100:
+            temp_path = index_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for path, (key, size) in self.entries.items():
+                    f.write(json.dumps({"path": path, "key": key, "size": size}) + "\n")
+            os.replace(temp_path, index_path)
+
+        self.file = open(index_path, 'a', encoding='utf-8')
+        self.destination_folder = destination_folder
+
+    def _close_file(self):
+        """Close the open journal"""
+        if self.file:
+            self.file.close()
+        self.file = None
@@ -0,0 +1,133 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from PIL import Image
+from managers.defect_renderer import OverlayCompositor, prepare_base_image
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8: no shared memory, images are rendered in the calling thread
+    shared_memory = None
+
+# Image info entries the encoders read when saving (kept on the rendered copies)
+SAVE_INFO_KEYS = ("icc_profile", "transparency", "dpi")
+
+def render_defect_from_shared_memory(memory_name, mode, size, info, defect, output_path, encoder):
+    """
+    Render one defect on the shared base image and encode it to a file (runs in a worker process)
+
+    Args:
+        memory_name (str): Name of the shared memory block holding the raw base image
+        mode (str): Mode of the base image
+        size (tuple): Width and height of the base image
+        info (dict): Image info used by the encoder (ICC profile, transparency, DPI)
+        defect (Defect): Defect with its rectangles
+        output_path (str): Path of the file to write
+        encoder (ImageEncoder): Encoder profile used to write the file
+
+    Returns:
+        tuple: (rectangles drawn, seconds spent encoding, bytes written)
+    """
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        # The base image reads the shared buffer directly; the compositor draws on a private copy
+        base_image = Image.frombuffer(mode, size, memory.buf, "raw", mode, 0, 1)
+        base_image.info.update(info)
+        compositor = OverlayCompositor(base_image)
+        del base_image
+
+        return compositor.save_defect(defect, output_path, encoder)
+    finally:
+        memory.close()
+
+class RenderPool:
+    """
+    Renders and encodes all defect variants of an image in parallel worker processes.
+    The decoded base image is placed in shared memory once instead of being pickled per defect.
+    """
+    def __init__(self, max_workers=None):
+        # Number of worker processes (defaults to one less than the number of CPUs)
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+
+        # Worker processes (created on first use)
+        self.executor = None
+
+    def is_available(self):
+        """Check if parallel rendering can be used on this Python version"""
+        return shared_memory is not None and self.max_workers > 1
+
+    def render(self, original_image, jobs, encoder):
+        """
+        Render and save several defects of the same image
+
+        Args:
+            original_image (Image): Full-resolution base image
+            jobs (list): (defect, output path) pairs; output paths must be distinct
+            encoder (ImageEncoder): Encoder profile used to write the files
+
+        Returns:
+            list: (rectangles drawn, seconds spent encoding, bytes written) per job, in order
+            ((0, 0, 0) for failed jobs)
+
+        Raises:
+            BrokenProcessPool: A worker process died; the pool must be reset and the defects saved another way
+        """
+        base_image = prepare_base_image(original_image)
+        if base_image is original_image:
+            base_image.load()
+        data = base_image.tobytes()
+        info = {key: original_image.info[key] for key in SAVE_INFO_KEYS if key in original_image.info}
+
+        memory = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        try:
+            memory.buf[:len(data)] = data
+            del data
+
+            futures = [
+                self._get_executor().submit(
+                    render_defect_from_shared_memory, memory.name, base_image.mode,
+                    base_image.size, info, defect, output_path, encoder
+                )
+                for defect, output_path in jobs
+            ]
+
+            # Every worker must be finished with the block before it is released
+            results = []
+            broken = None
+            for (defect, output_path), future in zip(jobs, futures):
+                try:
+                    results.append(future.result())
+                except BrokenProcessPool as e:
+                    broken = e
+                except Exception as e:
+                    print(f"Failed to save {os.path.basename(output_path)}: {str(e)}")
+                    results.append((0, 0, 0))
+            if broken:
+                raise broken
+            return results
+        finally:
+            memory.close()
+            memory.unlink()
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def reset(self):
+        """Stop the worker processes after a failure, dropping queued jobs (a new pool is created on next use)"""
+        if self.executor:
+            try:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+            except TypeError:
+                # Python 3.8: queued jobs cannot be cancelled
+                self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def _get_executor(self):
+        """Create the worker process pool on first use"""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self.executor
@@ -0,0 +1,101 @@
+import queue
+import threading
+
+class SaveQueue:
+    """
+    Saves annotated images on a background thread so the UI can move on to the next image
+    right away. Jobs hold an immutable snapshot of the defects and are processed in order.
+    """
+    def __init__(self, save_defects, load_image):
+        # save_defects(image_path, original_filename, defects, get_original_image) -> (saved, total, reused)
+        self.save_defects = save_defects
+
+        # load_image(image_path) -> Image, used when the full-resolution image was not decoded yet
+        self.load_image = load_image
+
+        # Jobs waiting for the worker, and how many have not finished yet
+        self.jobs = queue.Queue()
+        self.pending = 0
+        self.lock = threading.Lock()
+
+        # Worker thread (started on first use)
+        self.thread = None
+
+    def submit(self, original_image, image_path, original_filename, defects, on_done):
+        """
+        Queue the defects of an image for saving
+
+        Args:
+            original_image (Image or None): Full-resolution image, or None to decode it in the background
+            image_path (str): Full path of the source image
+            original_filename (str): Source image filename
+            defects (list): Snapshot of the defects to save (not modified by the UI afterwards)
+            on_done (callable): Called from the worker thread as on_done(original_filename, saved, total, reused)
+
+        Returns:
+            int: Number of saves waiting, including this one
+        """
+        def task():
+            # The image is only decoded if the output mode renders it
+            get_original_image = (
+                (lambda: original_image) if original_image is not None
+                else (lambda: self.load_image(image_path))
+            )
+            return self.save_defects(image_path, original_filename, defects, get_original_image)
+        return self.submit_task(task, original_filename, on_done)
+    
+    def submit_task(self, task, original_filename, on_done):
+        """
+        Queue another kind of save (e.g. a classification without rendering)
+        
+        Args:
+            task (callable): Runs on the worker thread and returns (saved, total, reused)
+            original_filename (str): Source image filename, passed to on_done
+            on_done (callable): Called from the worker thread as on_done(original_filename, saved, total, reused)
+            
+        Returns:
+            int: Number of saves waiting, including this one
+        """
+        with self.lock:
+            self.pending += 1
+            pending = self.pending
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._work, name="save-queue", daemon=True)
+                self.thread.start()
+        self.jobs.put((task, original_filename, on_done))
+        return pending
+
+    def get_pending_count(self):
+        """Get the number of saves that have not finished yet"""
+        with self.lock:
+            return self.pending
+
+    def shutdown(self):
+        """Finish all queued saves and stop the worker"""
+        with self.lock:
+            thread = self.thread
+            self.thread = None
+        if thread:
+            self.jobs.put(None)
+            thread.join()
+
+    def _work(self):
+        """Process queued jobs until shutdown"""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            task, original_filename, on_done = job
+
+            saved = 0
+            total = 0
+            reused = 0
+            try:
+                saved, total, reused = task()
+            except Exception as e:
+                print(f"Error saving {original_filename}: {e}")
+                total = max(total, 1)
+
+            with self.lock:
+                self.pending -= 1
+            on_done(original_filename, saved, total, reused)
@@ -0,0 +1,87 @@
+class GridIndex:
+    """
+    Uniform grid over image coordinates for finding the rectangles under a point.
+
+    Each rectangle is registered in every grid cell it overlaps, so a point lookup only tests the
+    rectangles of one cell. Very large rectangles are kept in a separate list instead of being
+    registered in hundreds of cells.
+    """
+    def __init__(self, cell_size=128, max_cells=256):
+        # Cell width and height in image pixels
+        self.cell_size = cell_size
+
+        # Rectangles covering more cells than this go to the large list
+        self.max_cells = max_cells
+
+        # Cell (column, row) -> set of keys, key -> (x1, y1, x2, y2, value), and keys of large rectangles
+        self.cells = {}
+        self.entries = {}
+        self.large = set()
+
+    def insert(self, key, coords, value):
+        """
+        Add a rectangle
+
+        Args:
+            key: Unique key of the rectangle (used to remove it)
+            coords (tuple): (x1, y1, x2, y2) in any corner order
+            value: Data returned by hit tests
+        """
+        x1, y1, x2, y2 = coords
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        self.entries[key] = (x1, y1, x2, y2, value)
+
+        cells = self._get_cells(x1, y1, x2, y2)
+        if cells is None:
+            self.large.add(key)
+            return
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        """Remove a rectangle"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        if key in self.large:
+            self.large.discard(key)
+            return
+        for cell in self._get_cells(*entry[:4]):
+            keys = self.cells.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.cells[cell]
+
+    def query_point(self, x, y):
+        """
+        Find the rectangles containing a point (edges included)
+
+        Returns:
+            list: (key, value) of each rectangle under the point, in no particular order
+        """
+        size = self.cell_size
+        keys = self.cells.get((int(x // size), int(y // size)), ())
+        hits = []
+        for group in (keys, self.large):
+            for key in group:
+                x1, y1, x2, y2, value = self.entries[key]
+                if x1 <= x <= x2 and y1 <= y <= y2:
+                    hits.append((key, value))
+        return hits
+
+    def clear(self):
+        """Remove all rectangles"""
+        self.cells = {}
+        self.entries = {}
+        self.large = set()
+
+    def _get_cells(self, x1, y1, x2, y2):
+        """List the cells a normalized rectangle overlaps, or None if there are too many"""
+        size = self.cell_size
+        columns = range(int(x1 // size), int(x2 // size) + 1)
+        rows = range(int(y1 // size), int(y2 // size) + 1)
+        if len(columns) * len(rows) > self.max_cells:
+            return None
+        return [(column, row) for column in columns for row in rows]
@@ -0,0 +1,178 @@
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+# Sidecar folder created inside the source folder for cached data
+SIDECAR_FOLDER = ".bug_validator"
+
+def make_thumbnail(source_path, thumbnail_path, size):
+    """
+    Create a thumbnail file for an image (runs in a worker process)
+
+    Args:
+        source_path (str): Full path of the source image
+        thumbnail_path (str): Path of the PNG thumbnail to write
+        size (int): Maximum width and height of the thumbnail
+
+    Returns:
+        bool: True if the thumbnail was written
+    """
+    try:
+        with Image.open(source_path) as image:
+            # JPEG decodes straight at a reduced scale, other formats ignore draft mode
+            image.draft("RGB", (size, size))
+            image.thumbnail((size, size))
+            if image.mode not in ("RGB", "RGBA", "L"):
+                image = image.convert("RGBA")
+
+            # Write to a temporary file first so readers never see a partial thumbnail
+            temp_path = thumbnail_path + ".tmp"
+            image.save(temp_path, "PNG")
+        os.replace(temp_path, thumbnail_path)
+        return True
+    except Exception as e:
+        print(f"Failed to create thumbnail for {source_path}: {str(e)}")
+        return False
+
+class ThumbnailCache:
+    """
+    Persistent thumbnail cache stored as a sidecar of the source folder. Thumbnails are keyed by
+    filename, modification time and size, and generated in a process pool.
+    """
+    def __init__(self, size=96, max_pending=64):
+        # Maximum thumbnail width and height
+        self.size = size
+
+        # Only the most recently requested thumbnails are generated; older requests are dropped
+        self.max_pending = max_pending
+
+        # Source folder and the folder its thumbnails are stored in
+        self.source_folder = ""
+        self.cache_folder = ""
+
+        # Thumbnail path of each file (derived from its modification time and size, so the file is
+        # only stat-ed once) and the thumbnails known to exist on disk
+        self.paths = {}
+        self.ready = set()
+
+        # Worker processes (created on first use) and pending jobs: thumbnail path -> future
+        self.executor = None
+        self.pending = OrderedDict()
+        self.lock = threading.RLock()
+
+    def set_source_folder(self, folder):
+        """Switch to the thumbnails of another source folder"""
+        self.cancel_pending()
+        with self.lock:
+            self.paths = {}
+            self.ready = set()
+        self.source_folder = folder
+        self.cache_folder = self._get_cache_folder(folder) if folder else ""
+
+    def _get_cache_folder(self, folder):
+        """Get the thumbnail folder, falling back to a temp folder if the source folder is read-only"""
+        sidecar = os.path.join(folder, SIDECAR_FOLDER, "thumbnails")
+        try:
+            os.makedirs(sidecar, exist_ok=True)
+            if os.access(sidecar, os.W_OK):
+                return sidecar
+        except OSError:
+            pass
+
+        folder_hash = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()
+        fallback = os.path.join(tempfile.gettempdir(), "bug_validator_thumbnails", folder_hash)
+        os.makedirs(fallback, exist_ok=True)
+        return fallback
+
+    def get_thumbnail_path(self, filename):
+        """Get the cache path of a thumbnail (changes whenever the source file changes)"""
+        stat = os.stat(os.path.join(self.source_folder, filename))
+        key = f"{filename}|{stat.st_mtime_ns}|{stat.st_size}|{self.size}"
+        return os.path.join(self.cache_folder, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png")
+
+    def invalidate(self, filename):
+        """Forget the thumbnail path of a file (e.g. deleted from the source folder)"""
+        with self.lock:
+            self.paths.pop(filename, None)
+
+    def request(self, filename, on_ready):
+        """
+        Get the thumbnail of an image, starting to generate it if it is not cached yet
+
+        Args:
+            filename (str): Image filename in the source folder
+            on_ready (callable): Called from a worker thread with the thumbnail path when a
+                generated thumbnail is ready
+
+        Returns:
+            str or None: Path of the cached thumbnail, or None if it is being generated
+        """
+        if not self.cache_folder:
+            return None
+        with self.lock:
+            thumbnail_path = self.paths.get(filename)
+        if thumbnail_path is None:
+            try:
+                thumbnail_path = self.get_thumbnail_path(filename)
+            except OSError:
+                return None
+            exists = os.path.exists(thumbnail_path)
+            with self.lock:
+                self.paths[filename] = thumbnail_path
+                if exists:
+                    self.ready.add(thumbnail_path)
+
+        with self.lock:
+            if thumbnail_path in self.ready:
+                return thumbnail_path
+            if thumbnail_path in self.pending:
+                self.pending.move_to_end(thumbnail_path)
+                return None
+
+            future = self._get_executor().submit(
+                make_thumbnail, os.path.join(self.source_folder, filename), thumbnail_path, self.size
+            )
+            self.pending[thumbnail_path] = future
+            future.add_done_callback(lambda done, path=thumbnail_path: self._on_done(path, done, on_ready))
+
+            # Drop the oldest requests that have not started yet (they have usually scrolled out of view)
+            while len(self.pending) > self.max_pending:
+                _, old_future = self.pending.popitem(last=False)
+                old_future.cancel()
+        return None
+
+    def cancel_pending(self):
+        """Cancel thumbnail jobs that have not started yet"""
+        with self.lock:
+            pending = list(self.pending.values())
+            self.pending.clear()
+        for future in pending:
+            future.cancel()
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        self.cancel_pending()
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def _get_executor(self):
+        """Create the worker process pool on first use"""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) - 1))
+        return self.executor
+
+    def _on_done(self, thumbnail_path, future, on_ready):
+        """Forget a finished job and report the new thumbnail"""
+        success = not future.cancelled() and future.exception() is None and future.result()
+        with self.lock:
+            if self.pending.get(thumbnail_path) is future:
+                del self.pending[thumbnail_path]
+            if success:
+                self.ready.add(thumbnail_path)
+        if success:
+            on_ready(thumbnail_path)
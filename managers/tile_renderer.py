@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+class TileRenderer:
+    """
+    Renders a zoomed image as fixed-size tiles so only the part visible in the canvas is resampled.
+    New tiles are rendered as cheap previews and listed for high quality refinement.
+    """
+    def __init__(self, tile_size=512, max_tiles=64):
+        # Tile edge length in displayed (zoomed) pixels
+        self.tile_size = tile_size
+
+        # Maximum number of rendered tiles kept across zoom levels
+        self.max_tiles = max_tiles
+
+        # Current source image and the size it is displayed at
+        self.source = None
+        self.display_size = (0, 0)
+        self.level_key = None
+
+        # (level key, tile x, tile y) -> PhotoImage, least recently used first
+        self.tiles = OrderedDict()
+
+        # Preview tiles waiting for refinement: (tile key, size, source box)
+        self.previews = []
+
+    def set_source(self, source, display_size, level_key):
+        """
+        Set the image to render and the zoomed size it is displayed at
+
+        Args:
+            source (Image): Decoded image to resample tiles from
+            display_size (tuple): Width and height of the whole zoomed image
+            level_key: Hashable key identifying the image and zoom level (used for caching tiles)
+        """
+        self.source = source
+        self.display_size = display_size
+        self.level_key = level_key
+
+    def get_tiles(self, viewport):
+        """
+        Get the tiles intersecting a viewport, rendering the ones that are not cached yet
+
+        Args:
+            viewport (tuple): (x1, y1, x2, y2) region of the zoomed image that is visible
+
+        Returns:
+            list: (tile key, x, y, PhotoImage) for every visible tile
+        """
+        if not self.source:
+            return []
+
+        display_width, display_height = self.display_size
+        x1, y1, x2, y2 = viewport
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(display_width, x2), min(display_height, y2)
+        if x2 <= x1 or y2 <= y1:
+            return []
+
+        size = self.tile_size
+        tiles = []
+        for tile_y in range(int(y1) // size, (int(y2) - 1) // size + 1):
+            for tile_x in range(int(x1) // size, (int(x2) - 1) // size + 1):
+                key = (self.level_key, tile_x, tile_y)
+                photo = self.tiles.get(key)
+                if photo is None:
+                    photo = self._render_tile(key, tile_x, tile_y)
+                    self.tiles[key] = photo
+                else:
+                    self.tiles.move_to_end(key)
+                tiles.append((key, tile_x * size, tile_y * size, photo))
+
+        # Tiles still on screen stay referenced by the caller, so evicting them here is safe
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+
+        return tiles
+
+    def take_previews(self):
+        """Get and forget the list of preview tiles that still need refining"""
+        previews = self.previews
+        self.previews = []
+        return previews
+
+    def refine_tile(self, key, image):
+        """
+        Write the high quality version of a tile over its preview pixels
+
+        Returns:
+            PhotoImage or None: The tile image, or None if the tile is no longer cached
+        """
+        photo = self.tiles.get(key)
+        if photo is None:
+            return None
+        photo.paste(image)
+        return photo
+
+    def discard(self, key):
+        """Forget a rendered tile (e.g. a preview whose refinement was cancelled)"""
+        self.tiles.pop(key, None)
+
+    def clear(self):
+        """Forget the source image and all rendered tiles"""
+        self.source = None
+        self.level_key = None
+        self.tiles.clear()
+        self.previews = []
+
+    def _render_tile(self, key, tile_x, tile_y):
+        """Resample a nearest-neighbour preview of one tile from the matching region of the source image"""
+        display_width, display_height = self.display_size
+        left = tile_x * self.tile_size
+        top = tile_y * self.tile_size
+        right = min(left + self.tile_size, display_width)
+        bottom = min(top + self.tile_size, display_height)
+
+        # Map the tile to source pixels (fractional box keeps tile edges seamless)
+        scale_x = self.source.width / display_width
+        scale_y = self.source.height / display_height
+        box = (left * scale_x, top * scale_y, right * scale_x, bottom * scale_y)
+
+        size = (right - left, bottom - top)
+        tile = self.source.resize(size, Image.NEAREST, box)
+        self.previews.append((key, size, box))
+        return ImageTk.PhotoImage(tile)
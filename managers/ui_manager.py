@@ -1,5 +1,7 @@
+import queue
 import tkinter as tk
 from tkinter import ttk, messagebox
+from managers.filmstrip import Filmstrip
 
 class UIManager:
     """
@@ -16,6 +18,22 @@ class UIManager:
         self.start_y = 0
         self.rect_id = None
         
+        # Canvas items of the highlighted (selected) rectangle and the rectangle under the cursor
+        self.highlighted_rect_id = None
+        self.hovered_rect_id = None
+        
+        # Canvas item of the displayed image (kept in place between frames) and the PhotoImage
+        # it shows, and the tiles shown for zoomed views: tile key -> (item id, PhotoImage)
+        self.image_item = None
+        self.image_item_photo = None
+        self.tile_items = {}
+        
+        # Pending after() job that swaps in high quality frames and tiles
+        self._refine_poll_job = None
+        
+        # Callbacks posted by background threads to run on the UI thread
+        self._ui_queue = queue.Queue()
+        
         # UI element references
         self.source_var = tk.StringVar()
         self.dest_var = tk.StringVar()
@@ -36,6 +54,27 @@ class UIManager:
         
         # Set up keyboard shortcuts
         self.setup_keyboard_shortcuts()
+        
+        # Start running callbacks posted by background threads
+        self._drain_ui_queue()
+    
+    def post(self, callback, *args):
+        """Run a callback on the UI thread (safe to call from background threads)"""
+        self._ui_queue.put((callback, args))
+    
+    def _drain_ui_queue(self):
+        """Run the callbacks posted by background threads"""
+        while True:
+            try:
+                callback, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in background callback: {e}")
+        
+        self.root.after(50, self._drain_ui_queue)
     
     def setup_ui(self):
         """Set up all UI components"""
@@ -135,6 +174,10 @@ class UIManager:
         self.right_panel = right_panel
         self.right_panel_canvas = right_panel_canvas
         
+        # Thumbnail filmstrip below the image (packed first so it keeps its height)
+        self.filmstrip = Filmstrip(left_panel, self.controller.on_filmstrip_select, self.controller.get_thumbnail)
+        self.filmstrip.pack(side=tk.BOTTOM, fill=tk.X)
+        
         # Create a frame for the canvas and scrollbars
         self.canvas_frame = ttk.Frame(left_panel)
         self.canvas_frame.pack(fill=tk.BOTH, expand=True)
@@ -152,9 +195,9 @@ class UIManager:
             yscrollcommand=v_scrollbar.set
         )
         
-        # Configure scrollbars to scroll the canvas
-        h_scrollbar.config(command=self.canvas.xview)
-        v_scrollbar.config(command=self.canvas.yview)
+        # Configure scrollbars to scroll the canvas (and bring in tiles for zoomed views)
+        h_scrollbar.config(command=self._on_canvas_xview)
+        v_scrollbar.config(command=self._on_canvas_yview)
         
         # Pack scrollbars and canvas
         h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
@@ -208,6 +251,10 @@ class UIManager:
         self.canvas.bind("<B1-Motion>", self.controller.draw)
         self.canvas.bind("<ButtonRelease-1>", self.controller.stop_draw)
         
+        # Pointer movement for hover feedback on rectangles
+        self.canvas.bind("<Motion>", self.controller.on_canvas_hover)
+        self.canvas.bind("<Leave>", lambda e: self.controller.clear_canvas_hover())
+        
         # Middle mouse button for panning
         self.canvas.bind("<ButtonPress-2>", self.controller.start_pan)
         self.canvas.bind("<B2-Motion>", self.controller.pan)
@@ -386,6 +433,10 @@ class UIManager:
                                    command=self.controller.save_and_next)
         save_next_btn.pack(fill=tk.X, padx=5, pady=5)
         
+        no_defects_btn = ttk.Button(save_frame, text="No Defects & Next (Ctrl+N)", 
+                                    command=self.controller.no_defects_and_next)
+        no_defects_btn.pack(fill=tk.X, padx=5, pady=5)
+        
         # Navigation buttons
         nav_buttons_frame = ttk.Frame(right_panel)
         nav_buttons_frame.pack(fill=tk.X, pady=10)
@@ -514,6 +565,10 @@ class UIManager:
         self.root.bind('<Control-Shift-Z>', self._on_redo)
         # For Windows/Linux systems that might use different case
         self.root.bind('<Control-Shift-z>', self._on_redo)
+        
+        # No defects found & next - Ctrl+N
+        self.root.bind('<Control-n>', self._on_no_defects)
+        self.root.bind('<Control-N>', self._on_no_defects)
     
     def _on_undo(self, event=None):
         """Handle undo keyboard shortcut"""
@@ -525,6 +580,14 @@ class UIManager:
         self.controller.redo()
         return "break"  # Prevent event from propagating
     
+    def _on_no_defects(self, event=None):
+        """Handle the "No defects found" keyboard shortcut"""
+        # While typing (results text, rename, folder paths) Ctrl+N is left to the text widget
+        if event is not None and isinstance(event.widget, (tk.Text, tk.Entry, ttk.Entry)):
+            return None
+        self.controller.no_defects_and_next()
+        return "break"  # Prevent event from propagating
+    
     def update_folder_paths(self, source, destination):
         """Update the folder path variables in the UI"""
         self.source_var.set(source)
@@ -540,8 +603,11 @@ class UIManager:
     
     def update_image_display(self, photo_image, filename, index, total):
         """Update the displayed image and navigation info"""
-        # Clear canvas (including all rectangles)
-        self.canvas.delete("all")
+        # Clear all rectangles and tiles (the image item is kept and only gets new pixels)
+        self.canvas.delete("defect", "drawing", "tile")
+        self.tile_items = {}
+        
+        image_processor = self.controller.image_processor
         
         # Display new image
         if photo_image:
@@ -552,15 +618,43 @@ class UIManager:
                               scrollregion=(0, 0, canvas_width, canvas_height))
             
             # Display the image
-            self.canvas.create_image(0, 0, anchor=tk.NW, image=photo_image)
-            
+            self._show_image_item(photo_image)
+        elif image_processor.is_tiled():
+            # Zoomed view: scroll over the whole zoomed size but only show the visible tiles
+            if self.image_item:
+                self.canvas.itemconfig(self.image_item, state="hidden")
+            display_width, display_height = image_processor.display_size
+            self.canvas.config(scrollregion=(0, 0, display_width, display_height))
+            self.render_visible_tiles()
+        
+        # Swap in the high quality version once it has been computed
+        self.schedule_refinement_poll()
+        
+        if photo_image or image_processor.is_tiled():
             # Update navigation label
-            self.nav_label.config(text=f"Image {index + 1}/{total} - {filename}")
+            self.update_navigation_info(filename, index, total)
             
             # Redraw only the selected defect's rectangles
             # This ensures that rectangles are always in sync with defect selection
             self.root.after(100, self.controller._draw_selected_defect_rectangles)
     
+    def update_navigation_info(self, filename, index, total):
+        """Update the navigation label (the total is marked with + while the folder is still being scanned)"""
+        more = "+" if self.controller.scan_in_progress else ""
+        self.nav_label.config(text=f"Image {index + 1}/{total}{more} - {filename}")
+    
+    def _show_image_item(self, photo_image):
+        """Show a PhotoImage in the canvas image item, creating the item only once"""
+        if self.image_item is None:
+            self.image_item = self.canvas.create_image(0, 0, anchor=tk.NW, image=photo_image, tags="image")
+        elif photo_image is not self.image_item_photo:
+            self.canvas.itemconfig(self.image_item, image=photo_image, state="normal")
+        else:
+            # Same buffer: its pixels were already replaced in place
+            self.canvas.itemconfig(self.image_item, state="normal")
+        self.image_item_photo = photo_image
+        self.canvas.tag_lower(self.image_item)
+    
     def clear_defects_list(self):
         """Clear the defects listbox"""
         self.defects_listbox.delete(0, tk.END)
@@ -631,6 +725,7 @@ class UIManager:
     def pan_canvas(self, dx, dy):
         """Pan the canvas by the specified amount"""
         self.canvas.scan_dragto(dx, dy, gain=1)
+        self.render_visible_tiles()
     
     def start_canvas_scan(self, x, y):
         """Start the canvas scan operation at the given position"""
@@ -639,6 +734,67 @@ class UIManager:
     def continue_canvas_scan(self, x, y):
         """Continue the canvas scan to the new position"""
         self.canvas.scan_dragto(x, y, gain=1)
+        self.render_visible_tiles()
+    
+    def _on_canvas_xview(self, *args):
+        """Scroll the canvas horizontally from the scrollbar"""
+        self.canvas.xview(*args)
+        self.render_visible_tiles()
+    
+    def _on_canvas_yview(self, *args):
+        """Scroll the canvas vertically from the scrollbar"""
+        self.canvas.yview(*args)
+        self.render_visible_tiles()
+    
+    def render_visible_tiles(self):
+        """Show the tiles of a zoomed view that intersect the visible canvas region"""
+        image_processor = self.controller.image_processor
+        if not image_processor.is_tiled():
+            return
+        
+        # Visible region in canvas coordinates (taking the scroll position into account)
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        viewport = (left, top, left + self.canvas.winfo_width(), top + self.canvas.winfo_height())
+        
+        visible = {}
+        for key, x, y, photo in image_processor.get_visible_tiles(viewport):
+            tile_item = self.tile_items.pop(key, None)
+            if tile_item is None:
+                tile_item = (self.canvas.create_image(x, y, anchor=tk.NW, image=photo, tags="tile"), photo)
+            visible[key] = tile_item
+        
+        # Drop tiles that scrolled out of view and keep the image below the rectangles
+        for item_id, _ in self.tile_items.values():
+            self.canvas.delete(item_id)
+        self.tile_items = visible
+        self.canvas.tag_lower("tile")
+        
+        # New tiles are previews until their high quality version is ready
+        self.schedule_refinement_poll()
+    
+    def schedule_refinement_poll(self, delay=30):
+        """Poll for high quality frames and tiles while any are being computed"""
+        if self._refine_poll_job is None and self.controller.image_processor.has_pending_refinements():
+            self._refine_poll_job = self.root.after(delay, self._poll_refinements)
+    
+    def _poll_refinements(self):
+        """Replace preview images on the canvas with their refined versions"""
+        self._refine_poll_job = None
+        image_processor = self.controller.image_processor
+        frame_changed, refined_tiles = image_processor.collect_refinements()
+        
+        # Refined pixels are pasted into the displayed buffers, so only a buffer of
+        # a different size needs to be attached to the image item
+        if frame_changed and self.image_item and image_processor.photo_image is not self.image_item_photo:
+            self._show_image_item(image_processor.photo_image)
+        for key, photo in refined_tiles:
+            if key in self.tile_items and self.tile_items[key][1] is not photo:
+                item_id, _ = self.tile_items[key]
+                self.canvas.itemconfig(item_id, image=photo)
+                self.tile_items[key] = (item_id, photo)
+        
+        self.schedule_refinement_poll()
     
     def _on_mousewheel(self, event):
         """Handle mouse wheel events for zooming or scrolling"""
@@ -709,13 +865,20 @@ class UIManager:
     def clear_canvas(self):
         """Clear the canvas"""
         self.canvas.delete("all")
+        self.image_item = None
+        self.image_item_photo = None
+        self.tile_items = {}
     
     def redraw_canvas(self):
         """Redraw the canvas with the current image"""
         photo_image = self.controller.image_processor.photo_image
         if photo_image:
-            self.canvas.delete("all")
-            self.canvas.create_image(0, 0, anchor=tk.NW, image=photo_image)
+            self.canvas.delete("defect", "drawing", "tile")
+            self.tile_items = {}
+            self._show_image_item(photo_image)
+        elif self.controller.image_processor.is_tiled():
+            self.canvas.delete("defect", "drawing")
+            self.render_visible_tiles()
     
     def redraw_defects(self, defects):
         """Redraw all defects on the canvas"""
@@ -734,7 +897,7 @@ class UIManager:
         # Redraw all defects
         for i, defect in enumerate(defects):
             # Add to listbox
-            self.add_defect_to_list(defect["name"])
+            self.add_defect_to_list(defect.name)
             
             # We don't draw rectangles here anymore - that's handled by the controller
         
@@ -914,18 +1077,46 @@ class UIManager:
         """Highlight the selected rectangle on the canvas"""
         defects = self.controller.defect_manager.get_defects()
         
-        # Reset all rectangles of the selected defect to normal appearance
-        if 0 <= defect_index < len(defects):
-            for rectangle in defects[defect_index]["rectangles"]:
-                rect_id = rectangle.get("canvas_rect")
-                if rect_id:
-                    self.canvas.itemconfig(rect_id, outline="yellow", width=1)
+        # Reset only the previously highlighted rectangle (items deleted since are ignored by Tk)
+        if self.highlighted_rect_id:
+            self.canvas.itemconfig(self.highlighted_rect_id, outline="yellow", width=1)
+        self.highlighted_rect_id = None
         
         # Highlight the selected rectangle
-        if 0 <= defect_index < len(defects) and 0 <= rectangle_index < len(defects[defect_index]["rectangles"]):
-            rect_id = defects[defect_index]["rectangles"][rectangle_index].get("canvas_rect")
+        if 0 <= defect_index < len(defects) and 0 <= rectangle_index < defects[defect_index].get_rectangle_count():
+            rect_id = defects[defect_index].get_canvas_rect(rectangle_index)
             if rect_id:
                 self.canvas.itemconfig(rect_id, outline="red", width=2)
+                self.highlighted_rect_id = rect_id
+    
+    def set_hover_rectangle(self, rect_id, over_rectangle):
+        """
+        Show which rectangle is under the cursor
+        
+        Args:
+            rect_id (int): Canvas item of the rectangle, if it is drawn
+            over_rectangle (bool): Whether the cursor is over any rectangle (drawn or not)
+        """
+        # Restore the previous rectangle unless it is the highlighted one
+        if self.hovered_rect_id and self.hovered_rect_id != self.highlighted_rect_id:
+            self.canvas.itemconfig(self.hovered_rect_id, outline="yellow")
+        self.hovered_rect_id = rect_id
+        if rect_id and rect_id != self.highlighted_rect_id:
+            self.canvas.itemconfig(rect_id, outline="orange")
+        
+        # Clicking selects the rectangle under the cursor
+        self.canvas.configure(cursor="hand2" if over_rectangle else "")
+    
+    def select_rectangle_in_list(self, rectangle_index):
+        """Select a rectangle in the rectangles listbox"""
+        if 0 <= rectangle_index < self.rectangles_listbox.size():
+            self.rectangles_listbox.selection_clear(0, tk.END)
+            self.rectangles_listbox.selection_set(rectangle_index)
+            self.rectangles_listbox.see(rectangle_index)
+    
+    def get_scroll_offset(self):
+        """Get the canvas position of the visible area's top-left corner"""
+        return (self.canvas.canvasx(0), self.canvas.canvasy(0))
     
     def clear_rectangles_list(self):
         """Clear the rectangles list"""
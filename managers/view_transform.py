@@ -0,0 +1,58 @@
+from array import array
+
+class ViewTransform:
+    """
+    Maps rectangles between image, canvas and window coordinates for one view of an image.
+
+    Image coordinates are full-resolution pixels. Canvas coordinates are positions in the canvas's
+    scrollable content (the image is drawn at the origin), which is where canvas items are placed.
+    Window coordinates are positions in the visible canvas widget, such as mouse event positions;
+    they differ from canvas coordinates by the scroll offset.
+
+    Rectangles are passed as flat sequences of x1, y1, x2, y2 values (any number of rectangles,
+    e.g. a defect's coordinate array) and are mapped in one call.
+    """
+    def __init__(self, image_size, canvas_size, zoom_level, scroll_offset=(0, 0)):
+        # Everything the transform was computed from (see ImageProcessor.get_view_transform)
+        self.key = (tuple(image_size), tuple(canvas_size), zoom_level, tuple(scroll_offset))
+
+        # Displayed pixels per image pixel (uniform: the image is fitted to the canvas keeping its aspect ratio)
+        img_width, img_height = image_size
+        canvas_width, canvas_height = canvas_size
+        self.scale = min(canvas_width / img_width, canvas_height / img_height) * zoom_level
+        self.inverse_scale = 1.0 / self.scale
+
+        # Canvas position of the window's top-left corner
+        self.scroll_x, self.scroll_y = scroll_offset
+
+    def image_to_canvas(self, coords):
+        """Map image coordinates to canvas coordinates (truncated to ints)"""
+        return self._map(coords, self.scale, 0, 0)
+
+    def canvas_to_image(self, coords):
+        """Map canvas coordinates to image coordinates (truncated to ints)"""
+        return self._map(coords, self.inverse_scale, 0, 0)
+
+    def window_to_image(self, coords):
+        """Map window coordinates (e.g. mouse positions) to image coordinates"""
+        return self._map(
+            coords, self.inverse_scale, self.scroll_x * self.inverse_scale, self.scroll_y * self.inverse_scale
+        )
+
+    def image_to_window(self, coords):
+        """Map image coordinates to window coordinates"""
+        return self._map(coords, self.scale, -self.scroll_x, -self.scroll_y)
+
+    def _map(self, coords, scale, offset_x, offset_y):
+        """
+        Scale and offset flat x, y pairs
+
+        Returns:
+            array: int32 values, x' = int(x * scale + offset_x) and y' = int(y * scale + offset_y)
+        """
+        values = [value * scale for value in coords]
+        if offset_x:
+            values[0::2] = [value + offset_x for value in values[0::2]]
+        if offset_y:
+            values[1::2] = [value + offset_y for value in values[1::2]]
+        return array('i', map(int, values))